@@ -8,7 +8,7 @@ Both the REST and the CLI interfaces for PicPocket are built atop this API.
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any, Optional, Protocol
+from typing import Any, AsyncContextManager, Optional, Protocol
 
 from picpocket.configuration import Configuration
 from picpocket.database.logic import Comparison
@@ -127,6 +127,17 @@ class PicPocket(Protocol):
         Check whether the configured backend is compatible with this API
         """
 
+    def connection_pool(self, size: int = 5) -> AsyncContextManager[None]:
+        """Reuse backend connections instead of opening one per call
+
+        While active, open connections are kept and shared between API
+        calls. This is intended for long-running processes such as the
+        web server.
+
+        Args:
+            size: The maximum number of idle connections to keep open
+        """
+
     async def import_data(
         self,
         path: Path,
@@ -284,8 +295,18 @@ class PicPocket(Protocol):
             The matching location if it exists.
         """
 
-    async def list_locations(self) -> list[Location]:
-        """Fetch all known locations"""
+    async def list_locations(
+        self, order: Optional[tuple[str, ...]] = None
+    ) -> list[Location]:
+        """Fetch all known locations
+
+        Args:
+            order: how to sort the returned locations as a list of
+                properties
+
+        Returns:
+            All known locations
+        """
 
     async def mount(self, name_or_id: str | int, /, path: Path):
         """Supply a path where a location is currently available
@@ -509,12 +530,18 @@ class PicPocket(Protocol):
         caption: Optional[str | NotSupplied] = NotSupplied(),
         alt: Optional[str | NotSupplied] = NotSupplied(),
         rating: Optional[int | NotSupplied] = NotSupplied(),
+        add_tags: Optional[list[str]] = None,
+        remove_tags: Optional[list[str]] = None,
     ):
         """Edit information about an image.
 
         Edit user-supplied metadata about an image. For all properties,
         supplying `None` will erase the existing value of that property
 
+        Tags can be added and removed as part of the same edit. All
+        changes are made in a single transaction, so either every change
+        is applied or none are.
+
         Args:
             id: The image to edit
             creator: Who made the image
@@ -522,6 +549,8 @@ class PicPocket(Protocol):
             caption: A caption of the image
             alt: Descriptive text of the image to be used as alt text
             rating: A numeric rating of the image
+            add_tags: Tags to apply to the image
+            remove_tags: Tags to remove from the image
         """
 
     async def tag_image(self, id: int, tag: str):
@@ -887,6 +916,9 @@ class PicPocket(Protocol):
     async def all_tag_names(self) -> set[str]:
         """Get the names of all used tags
 
+        Names may be cached briefly, so tags added by another process
+        can take some time to appear.
+
         Returns:
             The list of tags
         """
@@ -901,13 +933,16 @@ class PicPocket(Protocol):
             their description and the dict of their child tags.
         """
 
-    async def get_tag_set(self, *image_ids: int, minimum: int = 1) -> dict[str, int]:
+    async def get_tag_set(
+        self, *image_ids: int, minimum: int = 1, limit: Optional[int] = None
+    ) -> dict[str, int]:
         """Get the set of tags applied to any of a set of images
 
         Args:
             image_ids: The images to find tags for
             minimum: Only return tags that have been applied to this
                 many images.
+            limit: Only return this many of the most-applied tags.
 
         Returns:
             A dict with the tags as keys and their counts
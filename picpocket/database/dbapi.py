@@ -6,7 +6,10 @@ import json
 import logging
 import re
 import shutil
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, AsyncContextManager, AsyncGenerator, Optional, cast
@@ -22,6 +25,7 @@ from picpocket.database.logic import (
     Types,
     escape,
 )
+from picpocket.database.pool import ConnectionPool
 from picpocket.database.types import Image, Location, Tag, Task
 from picpocket.errors import (
     DataIntegrityError,
@@ -36,6 +40,15 @@ from picpocket.version import VERSION
 
 EXPIRATION = timedelta(days=1)
 
+# how many seconds the list of tag names is reused for. changes made by
+# this instance clear it, so this only bounds how long it takes to see
+# tags added by another process
+TAG_NAMES_TTL = 30
+
+# how many sessions to keep in memory. sessions can't be edited once
+# created, so the only cost of keeping one around is memory
+SESSION_CACHE_SIZE = 256
+
 
 class DbApi(PicPocket, ABC):
     """A DBAPI 2.0 Implementation of PicPocket
@@ -77,6 +90,14 @@ class DbApi(PicPocket, ABC):
 
     logger = logging.getLogger("picpocket.database")
 
+    _pool: Optional[ConnectionPool] = None
+    # (when fetched, names) for all_tag_names, and a count of changes
+    # made to the tags table so stale fetches aren't stored
+    _tag_names: Optional[tuple[float, frozenset[str]]] = None
+    _tag_changes = 0
+    # serialized data for recently created or fetched sessions, by id
+    _sessions: Optional[OrderedDict[int, str]] = None
+
     LOCATIONS_TABLE = {
         "id": Types.ID,
         "name": Types.TEXT,
@@ -137,10 +158,46 @@ class DbApi(PicPocket, ABC):
     async def connect(self):
         """Establish a connection with the underlying database.
 
+        If a connection pool is active, implementations should return
+        a connection from the pool instead (see :meth:`connection_pool`)
+
         Returns:
             A dbapi-compatible Connection object
         """
 
+    @abstractmethod
+    async def _open_connection(self):
+        """Open a new connection for use in a connection pool
+
+        Returns:
+            An open dbapi-compatible Connection object
+        """
+
+    async def reset_connection(self, connection, failed: bool):
+        """Prepare a pooled connection to be reused
+
+        The default rolls back anything uncommitted, matching what
+        closing a connection would do.
+
+        Args:
+            connection: The connection being returned to the pool
+            failed: Whether the connection was released due to an error
+        """
+        await connection.rollback()
+
+    @asynccontextmanager
+    async def connection_pool(self, size: int = 5) -> AsyncGenerator[None, None]:
+        if self._pool is not None:
+            raise ValueError("A connection pool is already active")
+
+        pool = ConnectionPool(self._open_connection, self.reset_connection, size)
+        self._pool = pool
+        try:
+            yield
+        finally:
+            self._pool = None
+            await pool.close()
+
     @abstractmethod
     def cursor(self, connection, commit: bool = False) -> AsyncContextManager:
         """Yield a cursor that rolls back on error and optionally commits
@@ -323,6 +380,8 @@ class DbApi(PicPocket, ABC):
                 ):
                     self.logger.warning("failed to import task %s", name)
 
+        self._tags_changed()
+
     async def export_data(
         self, path: Path, locations: Optional[list[str | int]] = None
     ):
@@ -715,21 +774,30 @@ class DbApi(PicPocket, ABC):
 
         return location
 
-    async def list_locations(self) -> list[Location]:
+    async def list_locations(
+        self, order: Optional[tuple[str, ...]] = None
+    ) -> list[Location]:
         async with (
             await self.connect() as connection,
             self.cursor(connection) as cursor,
         ):
-            return await self._list_locations(cursor)
+            return await self._list_locations(cursor, order)
 
-    async def _list_locations(self, cursor) -> list[Location]:
+    async def _list_locations(
+        self, cursor, order: Optional[tuple[str, ...]] = None
+    ) -> list[Location]:
         locations = []
+        values: dict[str, Any] = {}
 
         await cursor.execute(
-            """
-            SELECT id, name, description, path, source, destination, removable
-            FROM locations;
-            """,
+            self.sql.format(
+                """
+                SELECT id, name, description, path, source, destination, removable
+                FROM locations{};
+                """,
+                self._build_ordering(self.LOCATIONS_TABLE, order, None, None, values),
+            ),
+            values,
         )
         for row in await cursor.fetchall():
             locations.append(Location(*row, mount_point=self.mounts.get(row[0])))
@@ -795,6 +863,8 @@ class DbApi(PicPocket, ABC):
                     # return_id guarantees an id
                     tag_ids.append(cast(int, tag_id))
 
+            self._tags_changed()
+
         directories = [path]
         images: list[int] = []
         importer = await self._import_images(
@@ -1171,6 +1241,9 @@ class DbApi(PicPocket, ABC):
                 {"name": name, "last_ran": date},
             )
 
+        # copied images may have been given new tags
+        self._tags_changed()
+
         return added
 
     async def remove_task(self, name: str):
@@ -1334,6 +1407,9 @@ class DbApi(PicPocket, ABC):
             if image_id is None:
                 raise InvalidPathError(f"Image already exists at {root / destination}")
 
+        if tags:
+            self._tags_changed()
+
         return image_id
 
     async def _add_image_copy(
@@ -1631,6 +1707,8 @@ class DbApi(PicPocket, ABC):
         caption: Optional[str | NotSupplied] = NotSupplied(),
         alt: Optional[str | NotSupplied] = NotSupplied(),
         rating: Optional[int | NotSupplied] = NotSupplied(),
+        add_tags: Optional[list[str]] = None,
+        remove_tags: Optional[list[str]] = None,
     ):
         fields = []
         values: dict[str, Optional[str | int | list[str]]] = {"id": id}
@@ -1646,23 +1724,28 @@ class DbApi(PicPocket, ABC):
                 fields.append(key)
                 values[key] = value
 
-        if not fields:
+        if not (fields or add_tags or remove_tags):
             raise InputValidationError(f"No edits to image {id} requested")
 
-        statement = self.sql.format(
-            "UPDATE images SET {} WHERE id = {} RETURNING id;",
-            self.sql.join(
-                ", ",
-                [
-                    self.sql.join(
-                        " = ",
-                        (self.sql.identifier(field), self.sql.placeholder(field)),
-                    )
-                    for field in fields
-                ],
-            ),
-            self.sql.placeholder("id"),
-        )
+        if fields:
+            statement = self.sql.format(
+                "UPDATE images SET {} WHERE id = {} RETURNING id;",
+                self.sql.join(
+                    ", ",
+                    [
+                        self.sql.join(
+                            " = ",
+                            (self.sql.identifier(field), self.sql.placeholder(field)),
+                        )
+                        for field in fields
+                    ],
+                ),
+                self.sql.placeholder("id"),
+            )
+        else:
+            statement = self.sql.format(
+                "SELECT id FROM images WHERE id = {};", self.sql.placeholder("id")
+            )
 
         async with (
             await self.connect() as connection,
@@ -1671,46 +1754,57 @@ class DbApi(PicPocket, ABC):
             await cursor.execute(statement, values)
             row = await cursor.fetchone()
 
-        if not row:
-            raise UnknownItemError(f"Unknown image: {id}")
+            if not row:
+                raise UnknownItemError(f"Unknown image: {id}")
+
+            if remove_tags:
+                await self._untag_image(cursor, id, *remove_tags)
+
+            if add_tags:
+                await self._tag_image(cursor, id, *add_tags)
+
+        if add_tags:
+            self._tags_changed()
 
     async def tag_image(self, id: int, tag: str):
         async with (
             await self.connect() as connection,
             self.cursor(connection, commit=True) as cursor,
         ):
-            tag_id = await self._add_tag(cursor, tag, return_id=True)
+            await self._tag_image(cursor, id, tag)
 
-            await cursor.execute(
-                f"""
-                INSERT INTO image_tags (image, tag)
-                VALUES ({self.sql.param}, {self.sql.param})
-                ON CONFLICT DO NOTHING;
-                """,
-                (id, tag_id),
-            )
+        self._tags_changed()
+
+    async def _tag_image(self, cursor, id: int, *tags: str):
+        tag_ids = [await self._add_tag(cursor, tag, return_id=True) for tag in tags]
+
+        await cursor.executemany(
+            f"""
+            INSERT INTO image_tags (image, tag)
+            VALUES ({self.sql.param}, {self.sql.param})
+            ON CONFLICT DO NOTHING;
+            """,
+            [(id, tag_id) for tag_id in tag_ids],
+        )
 
     async def untag_image(self, id: int, tag: str):
         async with (
             await self.connect() as connection,
             self.cursor(connection, commit=True) as cursor,
         ):
-            await cursor.execute(
-                f"SELECT id FROM tags WHERE name = {self.sql.param};",
-                (serialize_tag(tag),),
-            )
-            row = await cursor.fetchone()
+            await self._untag_image(cursor, id, tag)
 
-            if row:
-                (tag_id,) = row
-
-                await cursor.execute(
-                    f"""
-                    DELETE FROM image_tags
-                    WHERE  image={self.sql.param} AND tag={self.sql.param};
-                    """,
-                    (id, tag_id),
-                )
+    async def _untag_image(self, cursor, id: int, *tags: str):
+        await cursor.execute(
+            f"""
+            DELETE FROM image_tags
+            WHERE image = {self.sql.param} AND tag IN (
+                SELECT id FROM tags
+                WHERE name IN ({", ".join([self.sql.param] * len(tags))})
+            );
+            """,
+            (id, *map(serialize_tag, tags)),
+        )
 
     async def move_image(self, id: int, path: Path, location: Optional[int] = None):
         async with (
@@ -2517,6 +2611,8 @@ class DbApi(PicPocket, ABC):
         ):
             await self._add_tag(cursor, tag, description)
 
+        self._tags_changed()
+
     async def _add_tag(
         self,
         cursor,
@@ -2559,6 +2655,7 @@ class DbApi(PicPocket, ABC):
             },
         )
         row = await cursor.fetchone()
+
         if not row and return_id:  # DO NOTHING won't return the id
             await cursor.execute(
                 f"SELECT id FROM tags WHERE name = {self.sql.param} LIMIT 1;",
@@ -2649,6 +2746,8 @@ class DbApi(PicPocket, ABC):
                         (new_serialized, new_escaped, id),
                     )
 
+        self._tags_changed()
+
         return count
 
     async def remove_tag(self, tag: str, cascade: bool = False):
@@ -2669,6 +2768,8 @@ class DbApi(PicPocket, ABC):
             await self.ensure_foreign_keys(cursor)
             await cursor.execute(statement, (serialized,))
 
+        self._tags_changed()
+
     async def get_tag(self, tag: str, children: bool = False) -> Tag:
         serialized = serialize_tag(tag)
 
@@ -2705,14 +2806,38 @@ class DbApi(PicPocket, ABC):
             return Tag(tag, description, kids)
 
     async def all_tag_names(self) -> set[str]:
+        fetched = time.monotonic()
+
+        if self._tag_names is not None:
+            cached, names = self._tag_names
+            if fetched - cached < TAG_NAMES_TTL:
+                return set(names)
+
+        changes = self._tag_changes
+
         async with (
             await self.connect() as connection,
             self.cursor(connection) as cursor,
         ):
             await cursor.execute("SELECT name FROM tags;")
-            return {
+            names = frozenset(
                 deserialize_tag(serialized) for (serialized,) in await cursor.fetchall()
-            }
+            )
+
+        # tags changed mid-fetch, what we read may already be out of date
+        if changes == self._tag_changes:
+            self._tag_names = (fetched, names)
+
+        return set(names)
+
+    def _tags_changed(self):
+        """Note that the tags table changed, clearing any cached names
+
+        Call this once the change is committed. Until then, fetches can
+        only see the old names, and would cache them as current.
+        """
+        self._tag_changes += 1
+        self._tag_names = None
 
     async def all_tags(self) -> dict[str, Any]:
         tags: dict[str, Any] = {}
@@ -2738,38 +2863,41 @@ class DbApi(PicPocket, ABC):
 
         return tags
 
-    async def get_tag_set(self, *image_ids: int, minimum: int = 1) -> dict[str, int]:
+    async def get_tag_set(
+        self, *image_ids: int, minimum: int = 1, limit: Optional[int] = None
+    ) -> dict[str, int]:
         tags = {}
 
         async with (
             await self.connect() as connection,
             self.cursor(connection) as cursor,
         ):
-            values = {"minimum": minimum or 0}  # or 0 to be nice to Nones
-            query = self.sql.format(
-                """
-                SELECT tag, COUNT(image) FROM image_tags
+            values: dict[str, Any] = {"minimum": minimum or 0}  # or 0 for Nones
+            statement = """
+                SELECT t.name, COUNT(i.image) FROM image_tags i
+                JOIN tags t ON t.id = i.tag
                 WHERE {}
-                GROUP BY tag
-                HAVING COUNT(image) >= {}
-                ORDER BY COUNT(image) DESC, tag ASC;
-                """,
+                GROUP BY i.tag, t.name
+                HAVING COUNT(i.image) >= {}
+                ORDER BY COUNT(i.image) DESC, i.tag ASC
+            """
+            parts = [
                 Number("image", Comparator.EQUALS, list(image_ids)).prepare(
                     self.sql, values
                 ),
                 self.sql.placeholder("minimum"),
-            )
+            ]
+
+            if limit is not None:
+                values["limit"] = limit
+                statement += "LIMIT {}"
+                parts.append(self.sql.placeholder("limit"))
+
+            query = self.sql.format(f"{statement};", *parts)
             await cursor.execute(query, values)
 
-            for tag_id, count in await cursor.fetchall():
-                await cursor.execute(
-                    f"SELECT name FROM tags WHERE id = {self.sql.param};",
-                    (tag_id,),
-                )
-                row = await cursor.fetchone()
-                if row:
-                    name = deserialize_tag(row[0])
-                    tags[name] = count
+            for name, count in await cursor.fetchall():
+                tags[deserialize_tag(name)] = count
 
         return tags
 
@@ -2797,7 +2925,8 @@ class DbApi(PicPocket, ABC):
         else:
             date = expires
 
-        serialized = json.dumps(data)
+        # sessions can hold thousands of ids, skip the padding
+        serialized = json.dumps(data, separators=(",", ":"))
 
         async with (
             await self.connect() as connection,
@@ -2813,6 +2942,9 @@ class DbApi(PicPocket, ABC):
             )
             (session_id,) = await cursor.fetchone()
 
+        # browsing a session usually starts right after it's created
+        self._cache_session(session_id, serialized)
+
         return session_id
 
     async def get_session(self, session_id: int) -> Optional[dict[str, Any]]:
@@ -2824,6 +2956,12 @@ class DbApi(PicPocket, ABC):
         Returns:
             the session data, if it exists
         """
+        if self._sessions is not None and session_id in self._sessions:
+            self._sessions.move_to_end(session_id)
+
+            # decode a fresh copy so callers are free to modify it
+            return json.loads(self._sessions[session_id])
+
         data = None
 
         async with (
@@ -2838,12 +2976,27 @@ class DbApi(PicPocket, ABC):
 
             if row:
                 if self.SESSION_INFO_TABLE["data"] == Types.TEXT:
-                    data = json.loads(row[0])
+                    serialized = row[0]
+                    data = json.loads(serialized)
                 else:
                     data = row[0]
+                    serialized = json.dumps(data, separators=(",", ":"))
+
+                self._cache_session(session_id, serialized)
 
         return data
 
+    def _cache_session(self, session_id: int, serialized: str):
+        """Remember a session's data, dropping the least recently used"""
+        if self._sessions is None:
+            self._sessions = OrderedDict()
+
+        self._sessions[session_id] = serialized
+        self._sessions.move_to_end(session_id)
+
+        while len(self._sessions) > SESSION_CACHE_SIZE:
+            self._sessions.popitem(last=False)
+
     async def prune_sessions(self):
         cutoff = datetime.utcnow().astimezone(timezone.utc)
 
@@ -2859,6 +3012,8 @@ class DbApi(PicPocket, ABC):
                 (cutoff,),
             )
 
+        self._sessions = None
+
     async def fetch_tags(self, cursor, id: int) -> list[str]:
         await cursor.execute(
             f"""
@@ -0,0 +1,93 @@
+"""A minimal pool for reusing database connections"""
+
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Awaitable, Callable
+
+LOGGER = logging.getLogger("picpocket.pool")
+
+
+class ConnectionPool:
+    """Keep a set of open connections to hand out instead of reconnecting
+
+    Connections are opened as needed. The pool never makes callers wait:
+    if every pooled connection is in use, a new one is opened and then
+    closed once released if the pool is already full.
+
+    Args:
+        open_connection: Open and return a new connection
+        reset_connection: Prepare a released connection for reuse. This
+            is passed the connection and whether the caller errored.
+        size: The maximum number of idle connections to keep open
+    """
+
+    def __init__(
+        self,
+        open_connection: Callable[[], Awaitable[Any]],
+        reset_connection: Callable[[Any, bool], Awaitable[None]],
+        size: int,
+    ):
+        if size < 1:
+            raise ValueError(f"Pool size must be positive: {size}")
+
+        self._open_connection = open_connection
+        self._reset_connection = reset_connection
+        self._size = size
+        self._idle: list = []
+        self._closed = False
+
+    @property
+    def idle(self) -> int:
+        """The number of open connections not currently in use"""
+        return len(self._idle)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncGenerator[Any, None]:
+        """Borrow a connection, returning it to the pool on exit"""
+        if self._closed:
+            raise ValueError("Connection pool is closed")
+
+        if self._idle:
+            connection = self._idle.pop()
+        else:
+            connection = await self._open_connection()
+
+        try:
+            yield connection
+        except BaseException:
+            await self._release(connection, True)
+            raise
+        else:
+            await self._release(connection, False)
+
+    async def _release(self, connection, failed: bool):
+        try:
+            await self._reset_connection(connection, failed)
+        except Exception:
+            LOGGER.exception("Resetting connection failed, discarding")
+            await self._close(connection)
+            return
+
+        if self._closed or len(self._idle) >= self._size:
+            await self._close(connection)
+        else:
+            self._idle.append(connection)
+
+    async def _close(self, connection):
+        try:
+            await connection.close()
+        except Exception:
+            LOGGER.exception("Closing connection failed")
+
+    async def close(self):
+        """Close all idle connections.
+
+        Connections still in use are closed when they are released
+        """
+        self._closed = True
+
+        while self._idle:
+            await self._close(self._idle.pop())
+
+
+__all__ = ("ConnectionPool",)
@@ -5,7 +5,7 @@ import logging
 import re
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Iterable, Optional
+from typing import Any, AsyncContextManager, Iterable, Optional
 
 import psycopg
 import psycopg.sql
@@ -24,6 +24,9 @@ LOGGER = logging.getLogger("picpocket.postgres")
 TYPES_FILE = Path(__file__).absolute().parent / "postgres_types.sql"
 SCHEMA_FILE = TYPES_FILE.parent / "postgres_schema.sql"
 
+# how many times a pooled connection runs a query before preparing it
+POOLED_PREPARE_THRESHOLD = 1
+
 
 class PostgreSQL(SQL):
     """SQL support for PostgreSQL"""
@@ -119,6 +122,13 @@ class Postgres(DbApi):
         finally:
             await cursor.close()
 
+    async def reset_connection(self, connection: AsyncConnection, failed: bool):
+        # match psycopg's behaviour when exiting a connection's context
+        if failed:
+            await connection.rollback()
+        else:
+            await connection.commit()
+
     @classmethod
     def parse_connection_info(
         cls, directory: Path, *, store_credentials: Optional[bool] = None, **kwargs
@@ -161,7 +171,22 @@ class Postgres(DbApi):
 
         return info, password
 
-    async def connect(self) -> AsyncConnection:
+    async def connect(self) -> AsyncConnection | AsyncContextManager[AsyncConnection]:
+        if self._pool is not None:
+            return self._pool.connection()
+
+        return await AsyncConnection.connect(**self._connection_info())
+
+    async def _open_connection(self) -> AsyncConnection:
+        connection = await AsyncConnection.connect(**self._connection_info())
+
+        # pooled connections are long-lived, so it's worth having the
+        # server prepare any statement they run more than once
+        connection.prepare_threshold = POOLED_PREPARE_THRESHOLD
+
+        return connection
+
+    def _connection_info(self) -> dict[str, Any]:
         backend_info = self.configuration.contents["backend"]
         if backend_info["type"] != self.BACKEND_NAME:
             raise ValueError(f"Wrong backend! {backend_info['type']}")
@@ -171,7 +196,7 @@ class Postgres(DbApi):
         if info.get("password") is True:
             info = {**info, "password": self.configuration.credentials}
 
-        return await AsyncConnection.connect(**info)
+        return info
 
     async def initialize(self):
         async with (
@@ -5,7 +5,7 @@ import logging
 import re
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import AsyncContextManager, Optional
 
 import aiosqlite
 from aiosqlite import Connection
@@ -170,7 +170,18 @@ class Sqlite(DbApi):
 
         return info, None
 
-    async def connect(self, should_exist: Optional[bool] = True) -> Connection:
+    async def connect(
+        self, should_exist: Optional[bool] = True
+    ) -> Connection | AsyncContextManager[Connection]:
+        if should_exist and self._pool is not None:
+            return self._pool.connection()
+
+        return aiosqlite.connect(self._database_path(should_exist))
+
+    async def _open_connection(self) -> Connection:
+        return await aiosqlite.connect(self._database_path(True))
+
+    def _database_path(self, should_exist: Optional[bool]) -> Path:
         backend_info = self.configuration.contents["backend"]
         if backend_info["type"] != self.BACKEND_NAME:
             raise ValueError(f"Wrong backend! {backend_info['type']}")
@@ -187,7 +198,7 @@ class Sqlite(DbApi):
             else:
                 raise ValueError(f"Database at {path} already exists")
 
-        return aiosqlite.connect(path)
+        return path
 
     async def initialize(self):
         LOGGER.debug("Creating tables")
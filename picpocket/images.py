@@ -37,7 +37,8 @@ def mime_type(path: Path) -> Optional[str]:
 
     if mime is None:
         try:
-            mime = Image.open(path).get_format_mimetype()
+            with Image.open(path) as image:
+                mime = image.get_format_mimetype()
         except Exception:
             pass
 
@@ -9,6 +9,11 @@ def full_path(raw: str) -> Path:
 
 def int_or_str(raw: str) -> int | str:
     """Convert an id to a number as necessary"""
+    # int() never accepts something starting with a letter, so most names
+    # can skip raising and catching a ValueError
+    if isinstance(raw, str) and raw[:1].isalpha():
+        return raw
+
     try:
         return int(raw)
     except ValueError:
@@ -5,22 +5,38 @@
     represents a minimal version that is usable enough to test how the
     rest of PicPocket works in pracice
 """
+
 from __future__ import annotations
 
 import asyncio
+import gzip
+import hashlib
 import json
+import os
 import re
 import sys
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from inspect import isawaitable
+from operator import attrgetter
 from pathlib import Path
-from subprocess import check_call, check_output
+from subprocess import CalledProcessError
 from tempfile import TemporaryDirectory
-from typing import Any, Optional, cast
+from types import MappingProxyType
+from typing import Any, Iterator, Mapping, NamedTuple, Optional
+from weakref import WeakValueDictionary
 
-import tornado
 from tornado.escape import url_escape
-from tornado.web import Application, HTTPError, RequestHandler, UIModule
+from tornado.httputil import HTTPServerRequest
+from tornado.routing import URLSpec
+from tornado.template import Loader
+from tornado.web import (
+    Application,
+    GZipContentEncoding,
+    HTTPError,
+    RequestHandler,
+    UIModule,
+)
 
 from picpocket.api import PicPocket
 from picpocket.database import logic
@@ -33,10 +49,69 @@ from picpocket.web.colors import DARK, LIGHT
 
 DEFAULT_MIME = "image/unknown"
 DEFAULT_PORT = 8888
+FILE_CHUNK_SIZE = 64 * 1024
 WEB_DIRECTORY = Path(__file__).absolute().parent
 SCRIPTS_DIRECTORY = WEB_DIRECTORY / "scripts"
 TEMPLATE_DIRECTORY = str(WEB_DIRECTORY / "templates")
+# shared by every app so each template is only compiled once per process
+TEMPLATE_LOADER = Loader(TEMPLATE_DIRECTORY)
 URL_BASE = f"/v{WEB_VERSION}"
+# tags are slash-separated path components, without leading/trailing spaces
+TAG_PATTERN = r"([^\/ ]([^\/]*[^\/ ])?)(?:\/[^\/ ]([^\/]*[^\/ ])?)*"
+# where each part of a search filter is stored
+_FILTER_FIELDS = {"parameter": 0, "comparison": 1, "value": 2}
+# search filter comparisons as (comparator, invert). the form sends
+# symbols, or words if javascript is disabled
+_TEXT_COMPARISONS = {
+    "=": (logic.Comparator.EQUALS, False),
+    "is": (logic.Comparator.EQUALS, False),
+    "≠": (logic.Comparator.EQUALS, True),
+    "is not": (logic.Comparator.EQUALS, True),
+    "starts with": (logic.Comparator.STARTS_WITH, False),
+    "doesn't start with": (logic.Comparator.STARTS_WITH, True),
+    "ends with": (logic.Comparator.ENDS_WITH, False),
+    "doesn't end with": (logic.Comparator.ENDS_WITH, True),
+    "contains": (logic.Comparator.CONTAINS, False),
+    "doesn't contain": (logic.Comparator.CONTAINS, True),
+}
+_ORDERED_COMPARISONS = {
+    "=": (logic.Comparator.EQUALS, False),
+    "is": (logic.Comparator.EQUALS, False),
+    "≠": (logic.Comparator.EQUALS, True),
+    "is not": (logic.Comparator.EQUALS, True),
+    "<": (logic.Comparator.LESS, False),
+    "≤": (logic.Comparator.LESS_EQUALS, False),
+    "≥": (logic.Comparator.GREATER_EQUALS, False),
+    ">": (logic.Comparator.GREATER, False),
+}
+
+_LOCATION_COMPARISONS = {
+    "option": False,
+    "=": False,
+    "is": False,
+    "≠": True,
+    "is not": True,
+}
+
+# the BaseApiHandler method that parses filters on each image property
+_FILTER_BUILDERS = {
+    "name": "text_filter",
+    "creator": "text_filter",
+    "path": "text_filter",
+    "title": "text_filter",
+    "caption": "text_filter",
+    "alt": "text_filter",
+    "extension": "extension_filter",
+    "rating": "number_filter",
+    "location": "location_filter",
+    "creation_date": "date_filter",
+    "last_modified": "date_filter",
+}
+
+_YES_NO = {"yes": True, "no": False}
+
+# rendered pages that never change, keyed on the handler that renders them
+_STATIC_PAGES: dict[type[RequestHandler], bytes] = {}
 
 
 @dataclass(frozen=True)
@@ -48,16 +123,30 @@ class Suggestions:
         return bool(self.count and self.lookback)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Endpoint:
     path: str
     title: str
     description: str
     submit: Optional[str] = None
-    parameters: Optional[list[dict[str, Any]]] = None
+    parameters: Optional[tuple[Mapping[str, Any], ...]] = None
     handler: Optional[type[BaseHandler]] = None
     icon: Optional[str] = None
 
+    def compiled_path(self, replacements: Mapping[str, str]) -> str:
+        """Get the path as a route pattern
+
+        Args:
+            replacements: Patterns to substitute into the path
+
+        Returns:
+            The pattern
+        """
+        if not replacements:
+            return self.path
+
+        return self.path.format(**replacements)
+
 
 class BaseHandler(RequestHandler):
     def render_web(
@@ -95,6 +184,25 @@ class BaseHandler(RequestHandler):
             **kwargs,
         )
 
+    def render_static(self, template: str, **kwargs):
+        """Render an html template that doesn't depend on the request.
+
+        The page is rendered the first time the handler is used and
+        reused after that.
+
+        Args:
+            template: The template to use for rendering
+            kwargs: Any arguments to pass through
+        """
+        page = _STATIC_PAGES.get(type(self))
+
+        if page is None:
+            page = self.render_string(template, **kwargs)
+            _STATIC_PAGES[type(self)] = page
+
+        self.set_header("Content-Type", "text/html; charset=UTF-8")
+        self.finish(page)
+
     def write_error(self, status_code: int, **kwargs):
         exception = kwargs["exc_info"][1]
 
@@ -147,10 +255,45 @@ class BaseHandler(RequestHandler):
             known_tags=known_tags,
             suggestions=suggestions,
             default_suggestions=default_suggestions,
-            tag_pattern=r"([^\/ ]([^\/]*[^\/ ])?)(?:\/[^\/ ]([^\/]*[^\/ ])?)*",
+            tag_pattern=TAG_PATTERN,
             **kwargs,
         )
 
+    def checkbox_argument(self, name: str) -> bool:
+        """Check whether a form checkbox was ticked"""
+        return self.get_body_argument(name, None) == "on"
+
+    def yes_no_argument(self, name: str) -> Optional[bool]:
+        """Get an optional yes/no form value"""
+        value = self.get_body_argument(name, None)
+        if not value:
+            return None
+
+        answer = _YES_NO.get(value.casefold())
+        if answer is None:
+            raise HTTPError(400, f"Invalid {name} value: {value}")
+
+        return answer
+
+    def int_argument(self, name: str, label: Optional[str] = None) -> Optional[int]:
+        """Get an optional whole-number form value"""
+        value = self.get_body_argument(name, None)
+        if not value:
+            return None
+
+        try:
+            return int(value)
+        except ValueError as exception:
+            raise HTTPError(400, f"Invalid {label or name}: {value}") from exception
+
+    def tag_arguments(self, name: str = "tags") -> list[str]:
+        """Get tags from the tag picker, or its no-script fallback"""
+        tags = self.get_body_arguments(name)
+        if tags:
+            return tags
+
+        return _split_lines(self.get_body_argument(f"{name}-list", None))
+
     def join_filters(
         self,
         filters: list[logic.Comparison],
@@ -195,45 +338,29 @@ class BaseHandler(RequestHandler):
         if value is None:
             raise HTTPError(400, f"Missing parameter: filter{index}-value")
 
-        match comparison:
-            # we might get the wrong one if noscript
-            case "=" | "is":
-                return logic.Text(parameter, logic.Comparator.EQUALS, value)
-            case "≠" | "is not":
-                return logic.Text(
-                    parameter, logic.Comparator.EQUALS, value, invert=True
-                )
-            case "starts with":
-                return logic.Text(parameter, logic.Comparator.STARTS_WITH, value)
-            case "doesn't start with":
-                return logic.Text(
-                    parameter,
-                    logic.Comparator.STARTS_WITH,
-                    value,
-                    invert=True,
-                )
-            case "ends with":
-                return logic.Text(parameter, logic.Comparator.STARTS_WITH, value)
-            case "doesn't end with":
-                return logic.Text(
-                    parameter,
-                    logic.Comparator.ENDS_WITH,
-                    value,
-                    invert=True,
-                )
-            case "contains":
-                return logic.Text(parameter, logic.Comparator.CONTAINS, value)
-            case "doesn't contain":
-                return logic.Text(
-                    parameter,
-                    logic.Comparator.CONTAINS,
-                    value,
-                    invert=True,
-                )
-            case _:
-                raise HTTPError(
-                    400, f"Invalid comparison filter{index}-comparison: {comparison}"
-                )
+        operation = _TEXT_COMPARISONS.get(comparison or "")
+        if operation is None:
+            raise HTTPError(
+                400, f"Invalid comparison filter{index}-comparison: {comparison}"
+            )
+
+        comparator, invert = operation
+
+        return logic.Text(parameter, comparator, value, invert=invert)
+
+    def extension_filter(
+        self,
+        index: str,
+        parameter: str,
+        comparison: Optional[str],
+        value: Optional[str],
+    ) -> logic.Comparison:
+        """Parse a filter for the extension parameter"""
+
+        if value is not None:
+            value = value.lower().lstrip(".")
+
+        return self.text_filter(index, parameter, comparison, value)
 
     def number_filter(
         self,
@@ -257,28 +384,20 @@ class BaseHandler(RequestHandler):
 
         try:
             number = int(value)
-        except Exception:
-            raise HTTPError(400, f"Invalid parameter: filter{index}-value: {value}")
-
-        match comparison:
-            # we might get the wrong one if noscript
-            case "=" | "is":
-                return logic.Number(parameter, logic.Comparator.EQUALS, number)
-            case "≠" | "is not":
-                return logic.Number(
-                    parameter, logic.Comparator.EQUALS, number, invert=True
-                )
-            case "<" | "≤" | "≥" | ">":
-                if comparison == "≤":
-                    comparison = "<="
-                elif comparison == "≥":
-                    comparison = ">="
-
-                return logic.Number(parameter, logic.Comparator(comparison), number)
-            case _:
-                raise HTTPError(
-                    400, f"Invalid comparison filter{index}-comparison: {comparison}"
-                )
+        except Exception as exception:
+            raise HTTPError(
+                400, f"Invalid parameter: filter{index}-value: {value}"
+            ) from exception
+
+        operation = _ORDERED_COMPARISONS.get(comparison or "")
+        if operation is None:
+            raise HTTPError(
+                400, f"Invalid comparison filter{index}-comparison: {comparison}"
+            )
+
+        comparator, invert = operation
+
+        return logic.Number(parameter, comparator, number, invert=invert)
 
     def date_filter(
         self,
@@ -301,29 +420,21 @@ class BaseHandler(RequestHandler):
             raise HTTPError(400, f"Missing parameter: filter{index}-value")
 
         try:
-            date = datetime.strptime(value, "%Y-%m-%d").astimezone()
-        except Exception:
-            raise HTTPError(400, f"Invalid parameter: filter{index}-value: {value}")
-
-        match comparison:
-            # we might get the wrong one if noscript
-            case "=" | "is":
-                return logic.DateTime(parameter, logic.Comparator.EQUALS, date)
-            case "≠" | "is not":
-                return logic.DateTime(
-                    parameter, logic.Comparator.EQUALS, date, invert=True
-                )
-            case "<" | "≤" | "≥" | ">":
-                if comparison == "≤":
-                    comparison = "<="
-                elif comparison == "≥":
-                    comparison = ">="
-
-                return logic.DateTime(parameter, logic.Comparator(comparison), date)
-            case _:
-                raise HTTPError(
-                    400, f"Invalid comparison filter{index}-comparison: {comparison}"
-                )
+            date = datetime.fromisoformat(value).astimezone()
+        except Exception as exception:
+            raise HTTPError(
+                400, f"Invalid parameter: filter{index}-value: {value}"
+            ) from exception
+
+        operation = _ORDERED_COMPARISONS.get(comparison or "")
+        if operation is None:
+            raise HTTPError(
+                400, f"Invalid comparison filter{index}-comparison: {comparison}"
+            )
+
+        comparator, invert = operation
+
+        return logic.DateTime(parameter, comparator, date, invert=invert)
 
 
 class BaseApiHandler(BaseHandler):
@@ -331,71 +442,235 @@ class BaseApiHandler(BaseHandler):
         self,
         endpoint: Endpoint,
         picpocket: PicPocket,
-        local_actions: set[str],
+        local_actions: Mapping[str, str],
         suggestions: Suggestions,
     ):
         self.endpoint = endpoint
         self.api = picpocket
         self.local_actions = local_actions
         self.suggestions = suggestions
+        # handlers only live for one request, so this can't go stale
+        self._locations: dict[int | str, asyncio.Future[Optional[Location]]] = {}
+
+    async def lookup_location(self, name_or_id: int | str) -> Optional[Location]:
+        """Get a location, reusing any lookup already made this request"""
+        if name_or_id not in self._locations:
+            self._locations[name_or_id] = asyncio.ensure_future(
+                self.api.get_location(name_or_id)
+            )
+
+        return await self._locations[name_or_id]
+
+    async def location_filter(
+        self,
+        index: str,
+        parameter: str,
+        comparison: Optional[str],
+        value: Optional[str],
+    ) -> logic.Comparison:
+        """Parse a filter for the location parameter"""
+
+        invert = _LOCATION_COMPARISONS.get(comparison or "")
+        if invert is None:
+            raise HTTPError(
+                400, f"Invalid value for filter{index}-comparison: {comparison}"
+            )
+
+        if value is None:
+            raise HTTPError(400, f"Missing parameter: filter{index}-value")
+
+        location = await self.lookup_location(int_or_str(value))
+        if location is None:
+            raise HTTPError(400, f"Unknown location: {value}")
+
+        return logic.Number(
+            parameter, logic.Comparator.EQUALS, location.id, invert=invert
+        )
+
+    async def location_names(self) -> dict[int, str]:
+        """Get the names of all locations, by id"""
+        return {
+            location.id: location.name for location in await self.api.list_locations()
+        }
+
+    async def task_location_options(
+        self,
+    ) -> tuple[dict[str, list[str]], dict[int, str]]:
+        """Get the locations a task can copy from and to
+
+        Returns:
+            The source and destination names (for form options), and the
+            names of all locations by id
+        """
+        locations = await self.api.list_locations(order=("name",))
+
+        source = [location.name for location in locations if location.source]
+        if not source:
+            raise HTTPError(400, "Create a source location first")
+
+        destination = [location.name for location in locations if location.destination]
+        if not destination:
+            raise HTTPError(400, "Create a destination location first")
+
+        names = {location.id: location.name for location in locations}
+
+        return {"source": source, "destination": destination}, names
+
+    async def display_image_ids(
+        self,
+        ids: list[int],
+        action: str = "Found",
+        suggestions: bool = False,
+    ):
+        image = await self.api.get_image(ids[0], tags=True) if ids else None
+
+        await self._display(ids, image, action, suggestions)
 
     async def display_images(
         self,
-        images: list[int] | list[Image],
+        images: list[Image],
         action: str = "Found",
         suggestions: bool = False,
+    ):
+        ids = list(map(attrgetter("id"), images))
+
+        await self._display(ids, images[0] if images else None, action, suggestions)
+
+    async def _display(
+        self,
+        ids: list[int],
+        image: Optional[Image],
+        action: str,
+        suggestions: bool,
     ):
         query = ""
         forward = ""
-        image = None
-        location_name = None
-        if images:
-            if isinstance(images[0], int):
-                # mypy doesn't trust the above isinstance check
-                ids = cast(list[int], images)
-                image = await self.api.get_image(ids[0], tags=True)
-            else:
-                # mypy doesn't trust the above isinstance check
-                images = cast(list[Image], images)
-                ids = [image.id for image in images]
-                image = images[0]
-
-            if image:
-                location = await self.api.get_location(image.location)
-                if location:
-                    location_name = location.name
-
-            if len(ids) > 1:
-                session_id = await self.api.create_session(
-                    {"ids": ids, "suggestions": suggestions}
-                )
-                query = f"?set={session_id}"
-                forward = self.reverse_url("images-get", ids[1])
-        else:
-            ids = []
+        location = None
+        session_id = None
+        session = {"ids": ids, "suggestions": suggestions}
+
+        # the location lookup and session creation are independent
+        if image and len(ids) > 1:
+            location, session_id = await asyncio.gather(
+                self.api.get_location(image.location),
+                self.api.create_session(session),
+            )
+        elif image:
+            location = await self.api.get_location(image.location)
+        elif len(ids) > 1:
+            session_id = await self.api.create_session(session)
+
+        if session_id is not None:
+            query = f"?set={session_id}"
+            forward = self.reverse_url("images-get", ids[1])
 
         self.render_web(
             "image.html",
             action=action,
             image_ids=ids,
             image=image,
-            location_name=location_name,
+            location_name=location.name if location else None,
             query=query,
             forward=forward,
             local_actions=self.local_actions,
         )
 
 
-class StyleHandler(BaseHandler):
-    def get(self):
-        self.set_header("Content-Type", "text/css")
-        self.render("style.css", light=LIGHT, dark=DARK)
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows gzipped responses
+
+    Codings listed with a q-value of 0 are refused, and a wildcard only
+    applies if gzip isn't listed explicitly.
+    """
+    accepted = {}
+    for coding in accept_encoding.split(","):
+        name, *parameters = (part.strip() for part in coding.split(";"))
+
+        quality = 1.0
+        for parameter in parameters:
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        accepted[name.lower()] = quality
+
+    return accepted.get("gzip", accepted.get("*", 0.0)) > 0
+
+
+class GZipTransform(GZipContentEncoding):
+    """Tornado's gzip transform, minus gzipping for 'gzip;q=0'"""
 
+    def __init__(self, request: HTTPServerRequest):
+        super().__init__(request)
+        self._gzipping = _accepts_gzip(request.headers.get("Accept-Encoding", ""))
+
+
+class StaticAsset(NamedTuple):
+    """A pre-rendered file served from memory"""
+
+    content_type: str
+    content: bytes
+    compressed: bytes
+    etag: str
+    compressed_etag: str
+
+    @classmethod
+    def render(cls, template: str, content_type: str, **kwargs) -> StaticAsset:
+        """Render a template and gzip the result
+
+        Args:
+            template: The template to render
+            content_type: The mime type of the rendered file
+            kwargs: Any arguments to pass through
+
+        Returns:
+            The rendered file
+        """
+        content = TEMPLATE_LOADER.load(template).generate(**kwargs)
+        compressed = gzip.compress(content, 6)
+
+        # each encoding is a different representation so needs its own etag
+        return cls(
+            content_type,
+            content,
+            compressed,
+            f'"{hashlib.sha1(content).hexdigest()}"',
+            f'"{hashlib.sha1(compressed).hexdigest()}"',
+        )
+
+
+class AssetHandler(RequestHandler):
+    asset: StaticAsset
 
-class ScriptHandler(BaseHandler):
     def get(self):
-        self.set_header("Content-Type", "application/javascript")
-        self.render("scripts.js")
+        self.set_header("Content-Type", self.asset.content_type)
+        self.set_header("Cache-Control", "public, max-age=3600")
+        # no Vary here, GZipTransform adds it to every response
+
+        if _accepts_gzip(self.request.headers.get("Accept-Encoding", "")):
+            self.set_header("Content-Encoding", "gzip")
+            self.set_header("Etag", self.asset.compressed_etag)
+            content = self.asset.compressed
+        else:
+            self.set_header("Etag", self.asset.etag)
+            content = self.asset.content
+
+        if self.check_etag_header():
+            self.set_status(304)
+            self.finish()
+        else:
+            self.finish(content)
+
+
+class StyleHandler(AssetHandler):
+    asset = StaticAsset.render("style.css", "text/css", light=LIGHT, dark=DARK)
+
+
+class ScriptHandler(AssetHandler):
+    asset = StaticAsset.render("scripts.js", "application/javascript")
 
 
 class RootHandler(BaseHandler):
@@ -403,9 +678,27 @@ class RootHandler(BaseHandler):
         self.redirect(self.reverse_url("home"))
 
 
+class TrailingSlashHandler(RequestHandler):
+    """Redirect paths with a trailing slash to their canonical route
+
+    A 308 is used so clients repeat POSTs (and their bodies) as-is.
+    """
+
+    def get(self, *_):
+        # collapse leading slashes too so this can't redirect off-site
+        url = "/" + self.request.path.strip("/")
+
+        if self.request.query:
+            url = f"{url}?{self.request.query}"
+
+        self.redirect(url, status=308)
+
+    head = post = get
+
+
 class ApiRootHandler(BaseHandler):
     def get(self):
-        self.render_web(
+        self.render_static(
             "index.html",
             title="PicPocket",
             description="A place for your photos",
@@ -418,7 +711,7 @@ class LocationsHandler(BaseApiHandler):
     async def get(self):
         sources = []
         destinations = []
-        for location in await self.api.list_locations():
+        for location in await self.api.list_locations(order=("name",)):
             if location.source:
                 sources.append(location)
 
@@ -449,7 +742,7 @@ class LocationsAddHandler(BaseApiHandler):
         location_type = self.get_body_argument("type")
         data["source"] = location_type == "Source"
         data["destination"] = location_type == "Destination"
-        data["removable"] = self.get_body_argument("removable", None) == "on"
+        data["removable"] = self.checkbox_argument("removable")
 
         if data.get("path"):
             data["path"] = full_path(data["path"])
@@ -556,28 +849,12 @@ class LocationsImportHandler(BaseApiHandler):
         creator = self.get_body_argument("creator", None) or None
         kwargs = {}
 
-        batch_str = self.get_body_argument("batch_size")
-        if batch_str:
-            try:
-                kwargs["batch_size"] = int(batch_str)
-            except Exception as exception:
-                raise HTTPError(400, f"Invalid batch size: {batch_str}") from exception
-
-        tags = self.get_body_arguments("tags", None)
-        if not tags:
-            tagsstr = self.get_body_argument("tags-list", None)
-            if tagsstr:
-                tags = tagsstr.splitlines()
+        batch_size = self.int_argument("batch_size", "batch size")
+        if batch_size:
+            kwargs["batch_size"] = batch_size
 
-        formats = []
-        formats_string = self.get_body_argument("file_formats")
-        if formats_string:
-            for file_format in formats_string.splitlines():
-                if file_format:
-                    formats.append(file_format)
-
-        if not formats:
-            formats = None
+        tags = self.tag_arguments()
+        formats = _split_lines(self.get_body_argument("file_formats")) or None
 
         try:
             imported = await self.api.import_location(
@@ -592,7 +869,7 @@ class LocationsImportHandler(BaseApiHandler):
                 400, f"Importing location failed: {name_or_id}"
             ) from exception
 
-        await self.display_images(
+        await self.display_image_ids(
             imported, "Imported", suggestions=bool(self.suggestions)
         )
 
@@ -618,7 +895,7 @@ class LocationsEditHandler(BaseApiHandler):
         for key in ("new_name", "description", "path"):
             data[key] = self.get_body_argument(key, None)
 
-        data["removable"] = self.get_body_argument("removable", None) == "on"
+        data["removable"] = self.checkbox_argument("removable")
 
         location_type = self.get_body_argument("type")
         data["source"] = location_type == "Source"
@@ -654,7 +931,7 @@ class LocationsRemoveHandler(BaseApiHandler):
     async def post(self, name_or_id):
         name_or_id = int_or_str(name_or_id)
 
-        force = self.get_body_argument("force", None) == "on"
+        force = self.checkbox_argument("force")
 
         try:
             await self.api.remove_location(name_or_id, force=force)
@@ -666,7 +943,7 @@ class LocationsRemoveHandler(BaseApiHandler):
 
 class ImagesHandler(BaseHandler):
     def get(self):
-        self.render_web(
+        self.render_static(
             "index.html",
             title="Images",
             description="Your Images",
@@ -678,91 +955,82 @@ class ImagesHandler(BaseHandler):
 
 
 class ImagesSearchHandler(BaseApiHandler):
-    def initialize(
-        self,
-        endpoint: Endpoint,
-        picpocket: PicPocket,
-        local_actions: set[str],
-        suggestions: Suggestions,
-    ):
-        self.endpoint = endpoint
-        self.api = picpocket
-        self.local_actions = local_actions
-        self.suggestions = suggestions
-        self.types = {
-            "number": [
-                ["<", {"input": "number"}],
-                ["≤", {"input": "number"}],
-                ["=", {"input": "number"}],
-                ["≥", {"input": "number"}],
-                [">", {"input": "number"}],
-                ["≠", {"input": "number"}],
-                ["is set", {"value": None}],
-                ["isn't set", {"value": None}],
-            ],
-            "date": [
-                ["<", {"input": "date"}],
-                ["≤", {"input": "date"}],
-                ["=", {"input": "date"}],
-                ["≥", {"input": "date"}],
-                [">", {"input": "date"}],
-                ["≠", {"input": "date"}],
-                ["is set", {"value": None}],
-                ["isn't set", {"value": None}],
-            ],
-            "text": [
-                ["is", {"input": "text"}],
-                ["is not", {"input": "text"}],
-                ["starts with", {"input": "text"}],
-                ["doesn't start with", {"input": "text"}],
-                ["ends with", {"input": "text"}],
-                ["doesn't end with", {"input": "text"}],
-                ["contains", {"input": "text"}],
-                ["doesn't contain", {"input": "text"}],
-                ["is set", {"value": None}],
-                ["isn't set", {"value": None}],
-            ],
-            "any": [
-                ["<", {"input": "number"}],
-                ["≤", {"input": "number"}],
-                ["=", {"input": "number"}],
-                ["≥", {"input": "number"}],
-                [">", {"input": "number"}],
-                ["≠", {"input": "number"}],
-                ["is", {"input": "text"}],
-                ["is not", {"input": "text"}],
-                ["starts with", {"input": "text"}],
-                ["doesn't start with", {"input": "text"}],
-                ["ends with", {"input": "text"}],
-                ["doesn't end with", {"input": "text"}],
-                ["contains", {"input": "text"}],
-                ["doesn't contain", {"input": "text"}],
-                ["is set", {"value": None}],
-                ["isn't set", {"value": None}],
-            ],
-        }
-        self.properties = None
-        self.order: list[list[str]] = [
-            ["Name", "name", "The image file name (without extension)"],
-            ["Extension", "extension", "The image file suffix"],
-            ["Creator", "creator", "Who you listed as the author of the image"],
-            ["Location", "location", "Which device the image is stored on"],
-            [
-                "Path",
-                "path",
-                "The path to the image file (relative to the location root)",
-            ],
-            ["Title", "title", "The title you gave the image"],
-            ["Caption", "caption", "The caption you gave the image"],
-            ["Alt", "alt", "The descriptive text you gave the image"],
-            ["Rating", "rating", "What you rated the image"],
-            ["Creation Date", "creation_date", "When the image was made"],
-            [
-                "Last-Modified Date",
-                "last_modified",
-                "When the image file was last modified",
-            ],
-        ]
+    # the comparisons available for each type of search filter
+    types = {
+        "number": (
+            ("<", {"input": "number"}),
+            ("≤", {"input": "number"}),
+            ("=", {"input": "number"}),
+            ("≥", {"input": "number"}),
+            (">", {"input": "number"}),
+            ("≠", {"input": "number"}),
+            ("is set", {"value": None}),
+            ("isn't set", {"value": None}),
+        ),
+        "date": (
+            ("<", {"input": "date"}),
+            ("≤", {"input": "date"}),
+            ("=", {"input": "date"}),
+            ("≥", {"input": "date"}),
+            (">", {"input": "date"}),
+            ("≠", {"input": "date"}),
+            ("is set", {"value": None}),
+            ("isn't set", {"value": None}),
+        ),
+        "text": (
+            ("is", {"input": "text"}),
+            ("is not", {"input": "text"}),
+            ("starts with", {"input": "text"}),
+            ("doesn't start with", {"input": "text"}),
+            ("ends with", {"input": "text"}),
+            ("doesn't end with", {"input": "text"}),
+            ("contains", {"input": "text"}),
+            ("doesn't contain", {"input": "text"}),
+            ("is set", {"value": None}),
+            ("isn't set", {"value": None}),
+        ),
+        "any": (
+            ("<", {"input": "number"}),
+            ("≤", {"input": "number"}),
+            ("=", {"input": "number"}),
+            ("≥", {"input": "number"}),
+            (">", {"input": "number"}),
+            ("≠", {"input": "number"}),
+            ("is", {"input": "text"}),
+            ("is not", {"input": "text"}),
+            ("starts with", {"input": "text"}),
+            ("doesn't start with", {"input": "text"}),
+            ("ends with", {"input": "text"}),
+            ("doesn't end with", {"input": "text"}),
+            ("contains", {"input": "text"}),
+            ("doesn't contain", {"input": "text"}),
+            ("is set", {"value": None}),
+            ("isn't set", {"value": None}),
+        ),
+    }
+
+    # the properties images can be ordered by: (label, column, description)
+    order = (
+        ("Name", "name", "The image file name (without extension)"),
+        ("Extension", "extension", "The image file suffix"),
+        ("Creator", "creator", "Who you listed as the author of the image"),
+        ("Location", "location", "Which device the image is stored on"),
+        (
+            "Path",
+            "path",
+            "The path to the image file (relative to the location root)",
+        ),
+        ("Title", "title", "The title you gave the image"),
+        ("Caption", "caption", "The caption you gave the image"),
+        ("Alt", "alt", "The descriptive text you gave the image"),
+        ("Rating", "rating", "What you rated the image"),
+        ("Creation Date", "creation_date", "When the image was made"),
+        (
+            "Last-Modified Date",
+            "last_modified",
+            "When the image file was last modified",
+        ),
+    )
 
     async def get(self):
         existing_filters = []
@@ -783,8 +1051,14 @@ class ImagesSearchHandler(BaseApiHandler):
 
         filter_strategy = self.get_query_argument("filter-strategy", "all")
 
+        # these are independent, so there's no need to wait on one first
+        all_locations, tag_names = await asyncio.gather(
+            self.api.list_locations(),
+            self.api.all_tag_names(),
+        )
+
         locations = ["any"]
-        for location in await self.api.list_locations():
+        for location in all_locations:
             locations.append(location.name)
 
         filters = [
@@ -807,7 +1081,7 @@ class ImagesSearchHandler(BaseApiHandler):
             ],
         ]
 
-        known_tags = sorted(await self.api.all_tag_names())
+        known_tags = sorted(tag_names)
 
         order_properties = self.get_query_arguments("order-property")
         order_properties.extend([""] * (len(self.order) - len(order_properties)))
@@ -848,94 +1122,40 @@ class ImagesSearchHandler(BaseApiHandler):
 
     async def post(self):
         join = {"strategy": "all", "pattern": ""}
-        filter_info = {
-            "parameter": {},
-            "comparison": {},
-            "value": {},
-        }
-        indices = set()
+        # index: [parameter, comparison, value]
+        filter_info = {}
 
         for key in self.request.body_arguments:
-            match = re.search(r"^join-(strategy|patten)$", key)
-
-            if match:
-                join[match.group(1)] = self.get_body_argument(key)
-            else:
-                match = re.search(r"^filter(\d+)-(parameter|comparison|value)$", key)
-
-                if match:
-                    index = match.group(1)
-                    indices.add(index)
-
-                    kind = match.group(2)
-                    value = self.get_body_argument(key)
-
-                    filter_info[kind][index] = value
+            if key in ("join-strategy", "join-pattern"):
+                join[key[5:]] = self.get_body_argument(key)
+            elif key.startswith("filter"):
+                # filter<index>-<kind>
+                head, _, kind = key.partition("-")
+                index = head[6:]
+
+                if kind in _FILTER_FIELDS and index.isdecimal():
+                    filter_info.setdefault(index, [None, None, None])[
+                        _FILTER_FIELDS[kind]
+                    ] = self.get_body_argument(key)
 
         filters = {}
 
-        for index in indices:
-            if not filter_info["parameter"].get(index):
+        for index, (parameter, comparison, value) in filter_info.items():
+            if not parameter:
                 continue
 
-            parameter = filter_info["parameter"].get(index)
-            comparison = filter_info["comparison"].get(index)
-            value = filter_info["value"].get(index)
-            match parameter:
-                case "name" | "creator" | "path" | "title" | "caption" | "alt":
-                    filters[index] = self.text_filter(
-                        index,
-                        parameter,
-                        comparison,
-                        value,
-                    )
-                case "extension":
-                    filters[index] = self.text_filter(
-                        index,
-                        parameter,
-                        comparison,
-                        value.lower().lstrip("."),
-                    )
-                case "rating":
-                    filters[index] = self.number_filter(
-                        index,
-                        parameter,
-                        comparison,
-                        value,
-                    )
-                case "location":
-                    match comparison:
-                        case "option" | "is" | "is not" | "=" | "≠":
-                            location = await self.api.get_location(int_or_str(value))
-                            if location is None:
-                                raise HTTPError(400, f"Unknown location: {value}")
-
-                            filters[index] = logic.Number(
-                                "location",
-                                logic.Comparator.EQUALS,
-                                location.id,
-                                invert=comparison in ("≠", "is not"),
-                            )
-                        case _:
-                            raise HTTPError(
-                                400,
-                                (
-                                    f"Invalid value for filter{index}-comparison: "
-                                    f"{comparison}"
-                                ),
-                            )
-                case "creation_date" | "last_modified":
-                    filters[index] = self.date_filter(
-                        index,
-                        parameter,
-                        comparison,
-                        value,
-                    )
-                case _:
-                    raise HTTPError(
-                        400,
-                        f"Invalid value for filter{index}-parameter: {parameter}",
-                    )
+            builder = _FILTER_BUILDERS.get(parameter)
+            if builder is None:
+                raise HTTPError(
+                    400,
+                    f"Invalid value for filter{index}-parameter: {parameter}",
+                )
+
+            filter = getattr(self, builder)(index, parameter, comparison, value)
+            if isawaitable(filter):
+                filter = await filter
+
+            filters[index] = filter
 
         filter = self.join_filters(
             list(filters.values()), join["strategy"], join["pattern"]
@@ -957,13 +1177,13 @@ class ImagesSearchHandler(BaseApiHandler):
             elif blanks == "last":
                 column = f"{column}!"
             else:
-                raise HTTPError(f"Invalid blank position: {blanks}")
+                raise HTTPError(400, f"Invalid blank position: {blanks}")
 
             direction = self.get_body_argument(f"order{index}-direction", "ascending")
             if direction == "descending":
                 column = f"-{column}"
             elif direction != "ascending":
-                raise HTTPError(f"Invalid sort direction: {direction}")
+                raise HTTPError(400, f"Invalid sort direction: {direction}")
 
             order.append(column)
             index += 1
@@ -971,119 +1191,82 @@ class ImagesSearchHandler(BaseApiHandler):
         if not order:
             order = None
 
-        reachablestr = self.get_body_argument("reachable", None)
-        if reachablestr:
-            if reachablestr.lower() == "yes":
-                reachable = True
-            elif reachablestr.lower() == "no":
-                reachable = False
-            else:
-                raise HTTPError(f"Invalid reachable value: {reachablestr}")
-        else:
-            reachable = None
-
-        taggedstr = self.get_body_argument("tagged", None)
-        if taggedstr:
-            if taggedstr.lower() == "yes":
-                tagged = True
-            elif taggedstr.lower() == "no":
-                tagged = False
-            else:
-                raise HTTPError(f"Invalid tagged value: {taggedstr}")
-        else:
-            tagged = None
+        reachable = self.yes_no_argument("reachable")
+        tagged = self.yes_no_argument("tagged")
 
         tag_kwargs = {}
         for option in ("any_tags", "all_tags", "no_tags"):
-            tags = self.get_body_arguments(option, None)
-            if not tags:
-                text = self.get_body_argument(f"{option}-list", None)
-                if text:
-                    tags = list(text.splitlines())
-
+            tags = self.tag_arguments(option)
             if tags:
                 tag_kwargs[option] = tags
 
         limit_type = self.get_body_argument("limit-type", None)
         if limit_type == "count":
-            limitstr = self.get_body_argument("limit", None)
-            if limitstr:
-                try:
-                    limit = int(limitstr)
-                except Exception:
-                    raise HTTPError(f"Invalid limit: {limitstr}")
-            else:
-                limit = None
-
-            offsetstr = self.get_body_argument("offset", None)
-            if offsetstr:
-                try:
-                    offset = int(offsetstr)
-                except Exception:
-                    raise HTTPError(f"Invalid offset: {offsetstr}")
-            else:
-                offset = None
+            limit = self.int_argument("limit")
+            offset = self.int_argument("offset")
         else:
             limit = None
             offset = None
 
-            spanstr = self.get_body_argument("span", None)
-            if spanstr:
-                try:
-                    span = int(spanstr) / 2
-                except Exception:
-                    raise HTTPError(f"Invalid span: {spanstr}")
-
-                if span:
-                    span_type = self.get_body_argument("span-type", None)
-                    match span_type:
-                        case "minutes":
-                            offset = timedelta(minutes=span)
-                        case "hours":
-                            offset = timedelta(hours=span)
-                        case "days":
-                            offset = timedelta(days=span)
-
-                    time_filter = logic.DateTime(
-                        "creation_date",
-                        logic.Comparator.EQUALS,
-                        None,
-                        invert=True,
+            span = (self.int_argument("span") or 0) / 2
+            if span:
+                span_type = self.get_body_argument("span-type", None)
+                match span_type:
+                    case "minutes":
+                        window = timedelta(minutes=span)
+                    case "hours":
+                        window = timedelta(hours=span)
+                    case "days":
+                        window = timedelta(days=span)
+                    case _:
+                        raise HTTPError(400, f"Invalid span type: {span_type}")
+
+                time_filter = logic.DateTime(
+                    "creation_date",
+                    logic.Comparator.EQUALS,
+                    None,
+                    invert=True,
+                )
+
+                if filter:
+                    filter = logic.And(filter, time_filter)
+                else:
+                    filter = time_filter
+
+                ids = await self.api.get_image_ids(
+                    filter,
+                    reachable=reachable,
+                    order=("random",),
+                    limit=1,
+                    offset=None,
+                    tagged=tagged,
+                    **tag_kwargs,
+                )
+
+                # nothing matches, so nothing can match within the span
+                if not ids:
+                    await self.display_image_ids(
+                        ids, suggestions=bool(self.suggestions)
                     )
+                    return
 
-                    if filter:
-                        filter = logic.And(filter, time_filter)
-                    else:
-                        filter = time_filter
+                image = await self.api.get_image(ids[0])
 
-                    ids = await self.api.get_image_ids(
+                if image and image.creation_date:
+                    filter = logic.And(
                         filter,
-                        reachable=reachable,
-                        order=("random",),
-                        limit=1,
-                        offset=None,
-                        tagged=tagged,
-                        **tag_kwargs,
+                        logic.DateTime(
+                            "creation_date",
+                            logic.Comparator.GREATER_EQUALS,
+                            image.creation_date - window,
+                        ),
+                        logic.DateTime(
+                            "creation_date",
+                            logic.Comparator.LESS_EQUALS,
+                            image.creation_date + window,
+                        ),
                     )
 
-                    if ids:
-                        image = await self.api.get_image(ids[0])
-
-                        if image and image.creation_date:
-                            filter = logic.And(
-                                filter,
-                                logic.DateTime(
-                                    "creation_date",
-                                    logic.Comparator.GREATER_EQUALS,
-                                    image.creation_date - offset,
-                                ),
-                                logic.DateTime(
-                                    "creation_date",
-                                    logic.Comparator.LESS_EQUALS,
-                                    image.creation_date + offset,
-                                ),
-                            )
-
         ids = await self.api.get_image_ids(
             filter,
             reachable=reachable,
@@ -1094,14 +1277,14 @@ class ImagesSearchHandler(BaseApiHandler):
             **tag_kwargs,
         )
 
-        await self.display_images(ids, suggestions=bool(self.suggestions))
+        await self.display_image_ids(ids, suggestions=bool(self.suggestions))
 
 
 class ImagesUploadHandler(BaseApiHandler):
     async def get(self):
-        locations = await self.api.list_locations()
+        locations = await self.api.list_locations(order=("name",))
         location_names = []
-        for location in sorted(locations, key=lambda location: location.name):
+        for location in locations:
             if location.destination:
                 location_names.append(location.name)
 
@@ -1121,8 +1304,8 @@ class ImagesUploadHandler(BaseApiHandler):
     async def post(self):
         try:
             file = self.request.files["file"][0]
-        except Exception:
-            raise HTTPError(400, "You must supply a file")
+        except Exception as exception:
+            raise HTTPError(400, "You must supply a file") from exception
 
         path = Path(self.get_body_argument("path", "."))
         if not path.suffix:
@@ -1137,17 +1320,9 @@ class ImagesUploadHandler(BaseApiHandler):
         for key in ("creator", "title", "caption", "alt"):
             data[key] = self.get_body_argument(key, None) or None
 
-        rating = self.get_body_argument("rating", None)
-        if rating:
-            data["rating"] = int(rating)
-        else:
-            data["rating"] = None
+        data["rating"] = self.int_argument("rating")
 
-        data["tags"] = self.get_body_arguments("tags", None)
-        if not data["tags"]:
-            tagsstr = self.get_body_argument("tags-list", None)
-            if tagsstr:
-                data["tags"] = tagsstr.splitlines()
+        data["tags"] = self.tag_arguments()
 
         with TemporaryDirectory() as directory_name:
             source = Path(directory_name) / file["filename"]
@@ -1155,8 +1330,8 @@ class ImagesUploadHandler(BaseApiHandler):
 
             try:
                 image_id = await self.api.add_image_copy(source, location, path, **data)
-            except Exception:
-                raise HTTPError(400, "Copying image failed ")
+            except Exception as exception:
+                raise HTTPError(400, "Copying image failed ") from exception
 
         self.redirect(self.reverse_url("images-get", image_id))
 
@@ -1172,13 +1347,13 @@ class ImagesFindHandler(BaseApiHandler):
     async def post(self):
         try:
             path = full_path(self.get_body_argument("path"))
-        except Exception:
-            raise HTTPError(400, "Missing path")
+        except Exception as exception:
+            raise HTTPError(400, "Missing path") from exception
 
         try:
             image = await self.api.find_image(path, tags=True)
-        except Exception:
-            raise HTTPError(400, f"Finding image failed: {path}")
+        except Exception as exception:
+            raise HTTPError(400, f"Finding image failed: {path}") from exception
 
         if image is None:
             raise HTTPError(404, f"Finding image failed: {path}")
@@ -1188,9 +1363,9 @@ class ImagesFindHandler(BaseApiHandler):
 
 class ImagesVerifyHandler(BaseApiHandler):
     async def get(self):
-        locations = await self.api.list_locations()
+        locations = await self.api.list_locations(order=("name",))
         options = {"location": [None]}
-        for location in sorted(locations, key=lambda location: location.name):
+        for location in locations:
             options["location"].append(location.name)
 
         self.write_form(
@@ -1217,7 +1392,7 @@ class ImagesVerifyHandler(BaseApiHandler):
 
             location_id = location.id
 
-        reparse_exif = self.get_body_argument("exif", "off") == "on"
+        reparse_exif = self.checkbox_argument("exif")
 
         try:
             images = await self.api.verify_image_files(
@@ -1225,8 +1400,8 @@ class ImagesVerifyHandler(BaseApiHandler):
                 path=path,
                 reparse_exif=reparse_exif,
             )
-        except Exception:
-            raise HTTPError(400, "Verifying images failed ")
+        except Exception as exception:
+            raise HTTPError(400, "Verifying images failed ") from exception
 
         await self.display_images(images, "Missing")
 
@@ -1234,8 +1409,13 @@ class ImagesVerifyHandler(BaseApiHandler):
 class ImagesGetHandler(BaseApiHandler):
     async def get(self, image_id):
         image_id = int(image_id)
+        session_id = self.get_query_argument("set", None)
 
-        image = await self.api.get_image(image_id, tags=True)
+        # the session doesn't depend on the image, so fetch both at once
+        image, data = await asyncio.gather(
+            self.api.get_image(image_id, tags=True),
+            self.fetch_session(session_id),
+        )
 
         if image is None:
             raise HTTPError(404, f"Unknown image: {image_id}")
@@ -1248,21 +1428,16 @@ class ImagesGetHandler(BaseApiHandler):
         back = forward = index = count = None
         query = ""
         try:
-            session_id = self.get_query_argument("set", None)
-
-            if session_id:
-                data = await self.api.get_session(int(session_id))
-
-                if data:
-                    query = f"?set={session_id}"
-                    count = len(data["ids"])
-                    index = data["ids"].index(image_id)
+            if data:
+                query = f"?set={session_id}"
+                count = len(data["ids"])
+                index = data["ids"].index(image_id)
 
-                    if index > 0:
-                        back = self.reverse_url("images-get", data["ids"][index - 1])
+                if index > 0:
+                    back = self.reverse_url("images-get", data["ids"][index - 1])
 
-                    if index + 1 < len(data["ids"]):
-                        forward = self.reverse_url("images-get", data["ids"][index + 1])
+                if index + 1 < len(data["ids"]):
+                    forward = self.reverse_url("images-get", data["ids"][index + 1])
         except Exception:
             pass
 
@@ -1279,6 +1454,18 @@ class ImagesGetHandler(BaseApiHandler):
             local_actions=self.local_actions,
         )
 
+    async def fetch_session(
+        self, session_id: Optional[str]
+    ) -> Optional[dict[str, Any]]:
+        """Get a browsing session, ignoring any that are invalid"""
+        if not session_id:
+            return None
+
+        try:
+            return await self.api.get_session(int(session_id))
+        except Exception:
+            return None
+
 
 class ImagesFileHandler(BaseApiHandler):
     async def get(self, image_id):
@@ -1290,10 +1477,33 @@ class ImagesFileHandler(BaseApiHandler):
             raise HTTPError(404, f"Unknown image: {image_id}")
 
         if image.full_path is None:
-            raise HTTPError(500, f"Image on unmounted location: {id}")
+            raise HTTPError(500, f"Image on unmounted location: {image_id}")
+
+        with image.full_path.open("rb") as stream:
+            # Base the etag on the file's metadata rather than letting
+            # tornado hash the body so we can skip reading unchanged files
+            stat = os.fstat(stream.fileno())
+            self.set_header("Etag", f'"{image_id}-{stat.st_mtime_ns}-{stat.st_size}"')
+            self.set_header("Cache-Control", "private, max-age=3600")
+
+            if self.check_etag_header():
+                self.set_status(304)
+                return
+
+            self.set_header("Content-Type", mime_type(image.full_path) or DEFAULT_MIME)
+            self.set_header("Content-Length", stat.st_size)
 
-        self.write(image.full_path.read_bytes())
-        self.set_header("Content-Type", mime_type(image.full_path) or DEFAULT_MIME)
+            # send large files a piece at a time rather than holding
+            # the whole thing in memory
+            remaining = stat.st_size
+            while remaining > 0:
+                chunk = stream.read(min(FILE_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+
+                remaining -= len(chunk)
+                self.write(chunk)
+                await self.flush()
 
 
 class ImagesEditHandler(BaseApiHandler):
@@ -1329,14 +1539,12 @@ class ImagesEditHandler(BaseApiHandler):
                 if image.rating is None and other_image.rating is not None:
                     kwargs["rating"] = other_image.rating
 
-                if kwargs:
-                    await self.api.edit_image(image.id, **kwargs)
+                add_tags = [tag for tag in other_image.tags if tag not in image.tags]
 
-                for tag in other_image.tags:
-                    if tag not in image.tags:
-                        await self.api.tag_image(image.id, tag)
+                if kwargs or add_tags:
+                    await self.api.edit_image(image.id, **kwargs, add_tags=add_tags)
 
-                image = await self.api.get_image(int(image_id), tags=True)
+                    image = await self.api.get_image(int(image_id), tags=True)
 
         known_tags = sorted(await self.api.all_tag_names())
 
@@ -1360,16 +1568,16 @@ class ImagesEditHandler(BaseApiHandler):
                                     default_suggestions.append(tag)
 
                     if ids and index > 0:
-                        count = 0
+                        skip = set(image.tags) | set(default_suggestions)
                         lower = max(0, index - self.suggestions.count)
                         upper = index + self.suggestions.count
-                        for tag in await self.api.get_tag_set(*ids[lower:upper]):
-                            if tag not in image.tags and tag not in default_suggestions:
-                                suggestions.append(tag)
-                                count += 1
-
-                                if count == self.suggestions.count:
-                                    break
+                        # enough tags to have count left after skipping
+                        tag_set = await self.api.get_tag_set(
+                            *ids[lower:upper], limit=self.suggestions.count + len(skip)
+                        )
+                        suggestions = [tag for tag in tag_set if tag not in skip][
+                            : self.suggestions.count
+                        ]
             except Exception:
                 pass
 
@@ -1387,43 +1595,24 @@ class ImagesEditHandler(BaseApiHandler):
         for key in ("creator", "title", "caption", "alt"):
             data[key] = self.get_body_argument(key, None) or None
 
-        rating = self.get_body_argument("rating")
-        if rating:
-            data["rating"] = int(rating)
-        else:
-            data["rating"] = None
+        data["rating"] = self.int_argument("rating")
 
         existing = set()
         existingstr = self.get_body_argument("existing-tags", None)
         if existingstr:
             existing = set(json.loads(existingstr))
 
-        tags = set()
-        tags_list = self.get_body_arguments("tags", None)
-        if tags_list:
-            tags = set(tags_list)
-        else:
-            tagsstr = self.get_body_argument("tags-list", None)
-            if tagsstr:
-                tags = set(tagsstr.splitlines())
+        tags = set(self.tag_arguments())
 
         try:
-            id = int(image_id)
-            await self.api.edit_image(id, **data)
-        except Exception:
-            raise HTTPError(400, f"Editing image failed: {image_id}")
-
-        for tag in existing - tags:
-            try:
-                await self.api.untag_image(id, tag)
-            except Exception:
-                raise HTTPError(400, f"Removing tag failed: {image_id}, {tag}")
-
-        for tag in tags - existing:
-            try:
-                await self.api.tag_image(id, tag)
-            except Exception:
-                raise HTTPError(400, f"Add tag failed: {image_id}, {tag}")
+            await self.api.edit_image(
+                int(image_id),
+                **data,
+                add_tags=sorted(tags - existing),
+                remove_tags=sorted(existing - tags),
+            )
+        except Exception as exception:
+            raise HTTPError(400, f"Editing image failed: {image_id}") from exception
 
         url = self.reverse_url("images-get", image_id)
         try:
@@ -1443,10 +1632,10 @@ class ImagesMoveHandler(BaseApiHandler):
         if image is None:
             raise HTTPError(404, f"Unknown image: {image_id}")
 
-        locations = await self.api.list_locations()
+        locations = await self.api.list_locations(order=("name",))
         location_names = []
         current_location = None
-        for location in sorted(locations, key=lambda location: location.name):
+        for location in locations:
             location_names.append(location.name)
             if location.id == image.location:
                 current_location = location.name
@@ -1480,8 +1669,8 @@ class ImagesMoveHandler(BaseApiHandler):
 
         try:
             await self.api.move_image(image_id, path, location=location_id)
-        except Exception:
-            raise HTTPError(400, f"Moving image failed: {image_id}")
+        except Exception as exception:
+            raise HTTPError(400, f"Moving image failed: {image_id}") from exception
 
         url = self.reverse_url("images-get", image_id)
         try:
@@ -1508,12 +1697,12 @@ class ImagesRemoveHandler(BaseApiHandler):
         )
 
     async def post(self, image_id):
-        delete = self.get_body_argument("delete", False) == "on"
+        delete = self.checkbox_argument("delete")
 
         try:
             await self.api.remove_image(image_id, delete=delete)
-        except Exception:
-            raise HTTPError(400, f"Removing image failed: {image_id}")
+        except Exception as exception:
+            raise HTTPError(400, f"Removing image failed: {image_id}") from exception
 
         url = None
         try:
@@ -1556,8 +1745,8 @@ class TagsAddHandler(BaseApiHandler):
 
         try:
             await self.api.add_tag(name, description=description)
-        except Exception:
-            raise HTTPError(400, f"Moving tag failed: {name}")
+        except Exception as exception:
+            raise HTTPError(400, f"Moving tag failed: {name}") from exception
 
         self.redirect(f"{self.reverse_url('tags-get')}?name={url_escape(name)}")
 
@@ -1597,12 +1786,12 @@ class TagsMoveHandler(BaseApiHandler):
             raise HTTPError(400, "Please supply a tag name")
 
         new = self.get_body_argument("new")
-        cascade = self.get_body_argument("cascade", "off") == "on"
+        cascade = self.checkbox_argument("cascade")
 
         try:
             await self.api.move_tag(current, new, cascade=cascade)
-        except Exception:
-            raise HTTPError(400, f"Moving tag failed: {current}")
+        except Exception as exception:
+            raise HTTPError(400, f"Moving tag failed: {current}") from exception
 
         self.redirect(f"{self.reverse_url('tags-get')}?name={url_escape(new)}")
 
@@ -1632,8 +1821,8 @@ class TagsEditHandler(BaseApiHandler):
 
         try:
             await self.api.add_tag(name, description=description)
-        except Exception:
-            raise HTTPError(400, f"Editing tag failed: {name}")
+        except Exception as exception:
+            raise HTTPError(400, f"Editing tag failed: {name}") from exception
 
         self.redirect(f"{self.reverse_url('tags-get')}?name={url_escape(name)}")
 
@@ -1653,29 +1842,21 @@ class TagsRemoveHandler(BaseApiHandler):
         if not name:
             raise HTTPError(400, "Please supply a tag name")
 
-        cascade = self.get_body_argument("cascade", None) == "on"
+        cascade = self.checkbox_argument("cascade")
 
         try:
             await self.api.remove_tag(name, cascade=cascade)
-        except Exception:
-            raise HTTPError(400, f"Removing tag failed: {name}")
+        except Exception as exception:
+            raise HTTPError(400, f"Removing tag failed: {name}") from exception
 
         self.redirect(self.reverse_url("tags"))
 
 
 class TasksHandler(BaseApiHandler):
     async def get(self):
-        tasks = await self.api.list_tasks()
-        location_names = {}
-
-        for task in tasks:
-            for location_id in (task.source, task.destination):
-                if location_id not in location_names:
-                    location = await self.api.get_location(location_id)
-                    if location:
-                        location_names[location_id] = location.name
-                    else:
-                        location_names[location_id] = location.name
+        tasks, location_names = await asyncio.gather(
+            self.api.list_tasks(), self.location_names()
+        )
 
         self.render_web(
             "tasks.html",
@@ -1686,26 +1867,7 @@ class TasksHandler(BaseApiHandler):
 
 class TasksAddHandler(BaseApiHandler):
     async def get(self):
-        source = []
-        destination = []
-
-        for location in await self.api.list_locations():
-            if location.source:
-                source.append(location.name)
-
-            if location.destination:
-                destination.append(location.name)
-
-        options = {}
-        if source:
-            options["source"] = sorted(source)
-        else:
-            raise HTTPError(400, "Create a source location first")
-
-        if destination:
-            options["destination"] = sorted(destination)
-        else:
-            raise HTTPError(400, "Create a destination location first")
+        options, _ = await self.task_location_options()
 
         self.write_form(
             "form.html",
@@ -1724,14 +1886,14 @@ class TasksAddHandler(BaseApiHandler):
             data[key] = self.get_body_argument(key, None)
 
         for key in ("tags", "file_formats"):
-            group = self.get_body_argument(key, None)
+            group = _split_lines(self.get_body_argument(key, None))
             if group:
-                data[key] = list(group.splitlines())
+                data[key] = group
 
         try:
             await self.api.add_task(**data)
-        except Exception:
-            raise HTTPError(400, "Creating task failed")
+        except Exception as exception:
+            raise HTTPError(400, "Creating task failed") from exception
 
         self.redirect(self.reverse_url("tasks-get", data["name"]))
 
@@ -1760,41 +1922,33 @@ class TasksRunHandler(BaseApiHandler):
         since = None
         datestr = self.get_body_argument("since", None)
         if datestr:
-            since = datetime.strptime(datestr, "%Y-%m-%dT%H:%M").astimezone()
+            # datetime-local inputs submit ISO 8601 (YYYY-MM-DDTHH:MM)
+            try:
+                since = datetime.fromisoformat(datestr).astimezone()
+            except ValueError as exception:
+                raise HTTPError(400, f"Invalid date: {datestr}") from exception
 
-        full = self.get_body_argument("full", "off") == "on"
+        full = self.checkbox_argument("full")
 
-        tags = self.get_body_arguments("tags", None)
-        if not tags:
-            tagsstr = self.get_body_argument("tags-list", None)
-            if tagsstr:
-                tags = tagsstr.splitlines()
+        tags = self.tag_arguments()
 
         try:
             ids = await self.api.run_task(name, since=since, full=full, tags=tags)
         except Exception as exception:
-            raise HTTPError(400, repr(exception))
-            raise HTTPError(400, "Running task failed")
+            raise HTTPError(400, "Running task failed") from exception
 
-        await self.display_images(ids, "Copied", suggestions=bool(self.suggestions))
+        await self.display_image_ids(ids, "Copied", suggestions=bool(self.suggestions))
 
 
 class TasksGetHandler(BaseApiHandler):
     async def get(self, name):
-        task = await self.api.get_task(name)
+        task, location_names = await asyncio.gather(
+            self.api.get_task(name), self.location_names()
+        )
 
         if task is None:
             raise HTTPError(404, f"Unknown task: {name}")
 
-        location_names = {}
-        for location_id in (task.source, task.destination):
-            if location_id not in location_names:
-                location = await self.api.get_location(location_id)
-                if location:
-                    location_names[location_id] = location.name
-                else:
-                    location_names[location_id] = location.name
-
         self.render_web("task.html", task=task, location_names=location_names)
 
 
@@ -1822,32 +1976,13 @@ class TasksEditHandler(BaseApiHandler):
         if "formats" in configuration:
             existing["file_formats"] = "\n".join(configuration["formats"])
 
-        source = []
-        destination = []
+        options, names = await self.task_location_options()
 
-        for location in await self.api.list_locations():
-            if location.source:
-                source.append(location.name)
-
-            if location.destination:
-                destination.append(location.name)
-
-            if location.id == task.source:
-                existing["source"] = location.name
+        if task.source in names:
+            existing["source"] = names[task.source]
 
-            if location.id == task.destination:
-                existing["destination"] = location.name
-
-        options = {}
-        if source:
-            options["source"] = sorted(source)
-        else:
-            raise HTTPError(400, "Create a source location first")
-
-        if destination:
-            options["destination"] = sorted(destination)
-        else:
-            raise HTTPError(400, "Create a destination location first")
+        if task.destination in names:
+            existing["destination"] = names[task.destination]
 
         self.write_form(
             "form.html",
@@ -1867,14 +2002,14 @@ class TasksEditHandler(BaseApiHandler):
             data[key] = self.get_body_argument(key, None)
 
         for key in ("tags", "file_formats"):
-            group = self.get_body_argument(key, None)
+            group = _split_lines(self.get_body_argument(key, None))
             if group:
-                data[key] = list(group.splitlines())
+                data[key] = group
 
         try:
             await self.api.add_task(name, **data, force=True)
-        except Exception:
-            raise HTTPError(400, "Editing task failed")
+        except Exception as exception:
+            raise HTTPError(400, "Editing task failed") from exception
 
         self.redirect(self.reverse_url("tasks-get", name))
 
@@ -1891,8 +2026,8 @@ class TasksRemoveHandler(BaseApiHandler):
     async def post(self, name):
         try:
             await self.api.remove_task(name)
-        except Exception:
-            raise HTTPError(400, "Removing task failed")
+        except Exception as exception:
+            raise HTTPError(400, "Removing task failed") from exception
 
         self.redirect(self.reverse_url("tasks"))
 
@@ -1905,10 +2040,8 @@ class ShowInFinderHandler(RequestHandler):
         self.api = picpocket
 
     async def get(self, text_id: str):
-        try:
-            id = int(text_id)
-        except Exception:
-            raise HTTPError(400, f"Invalid id: {text_id}")
+        # the route only matches digits, which int() always accepts
+        id = int(text_id)
 
         id_type = self.get_query_argument("type", "image")
 
@@ -1934,9 +2067,12 @@ class ShowInFinderHandler(RequestHandler):
                 raise HTTPError(400, "Location path not known")
 
         try:
-            check_call(["open", "-R", str(path)])
-        except Exception:
-            raise HTTPError(500, f"opening {id_type} failed")
+            process = await asyncio.create_subprocess_exec("open", "-R", str(path))
+            returncode = await process.wait()
+            if returncode:
+                raise CalledProcessError(returncode, "open")
+        except Exception as exception:
+            raise HTTPError(500, f"opening {id_type} failed") from exception
 
         self.write("done")
 
@@ -1967,12 +2103,20 @@ class AppleScriptDialogHandler(RequestHandler):
             command.extend(["", filename])
 
         try:
-            pathstr = check_output(command, text=True).strip()
+            # the dialog waits on the user, so don't block other requests
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE
+            )
+            stdout, _ = await process.communicate()
+            if process.returncode:
+                raise CalledProcessError(process.returncode, command)
+
+            pathstr = stdout.decode().strip()
 
             if not pathstr:
                 raise HTTPError(400, "No file/folder selected")
-        except Exception:
-            raise HTTPError(500, "Choosing file failed")
+        except Exception as exception:
+            raise HTTPError(500, "Choosing file failed") from exception
 
         if location and location.path:
             pathstr = str(Path(pathstr).relative_to(location.path))
@@ -1988,13 +2132,18 @@ class NavBarHandler(UIModule):
     """The page navbar"""
 
     def render(self):
-        return self.render_string("modules/navbar.html", navbar=NAVBAR)
+        return NAVBAR_HTML
 
 
 class LocationDisplayHandler(UIModule):
     """A Picpocket location"""
 
-    def render(self, location: Location, local_actions: dict, link_id: bool = False):
+    def render(
+        self,
+        location: Location,
+        local_actions: Mapping[str, str],
+        link_id: bool = False,
+    ):
         return self.render_string(
             "modules/location.html",
             location=location,
@@ -2047,7 +2196,7 @@ class TaskDisplayHandler(UIModule):
         )
 
 
-NAVBAR = {
+NAVBAR: Mapping[str, Endpoint] = {
     "home": Endpoint(
         f"{URL_BASE}",
         "Home",
@@ -2105,7 +2254,77 @@ NAVBAR = {
 }
 
 
-ENDPOINTS: dict[str, dict[str, Endpoint]] = {
+# The navbar is identical on every page, so render it once up front
+NAVBAR_HTML = TEMPLATE_LOADER.load("modules/navbar.html").generate(navbar=NAVBAR)
+
+
+# parameters shared between endpoints
+_TAG_DESCRIPTION_PARAMETER = MappingProxyType(
+    {
+        "name": "description",
+        "description": "A description of the tag",
+        "required": False,
+        "input": "textarea",
+        "label": "Description:",
+    }
+)
+_TASK_SOURCE_PARAMETER = MappingProxyType(
+    {
+        "name": "source",
+        "description": "Where to copy images from",
+        "required": True,
+        "input": "select",
+        "label": "Source:",
+    }
+)
+_TASK_DESTINATION_PARAMETER = MappingProxyType(
+    {
+        "name": "destination",
+        "description": "Where to save images to",
+        "required": True,
+        "input": "select",
+        "label": "Destination:",
+    }
+)
+_TASK_CREATOR_PARAMETER = MappingProxyType(
+    {
+        "name": "creator",
+        "description": "Who to list as the creator of imorted images",
+        "required": False,
+        "input": "text",
+        "label": "Creator:",
+    }
+)
+_TASK_SOURCE_PATH_PARAMETER = MappingProxyType(
+    {
+        "name": "source_path",
+        "description": "Where to look for images",
+        "required": False,
+        "input": "text",
+        "label": "Source Path (relative to source root):",
+    }
+)
+_TASK_DESTINATION_FORMAT_PARAMETER = MappingProxyType(
+    {
+        "name": "destination_format",
+        "description": "Where to save copied images",
+        "required": False,
+        "input": "text",
+        "label": "Destination Format (relative to source root):",
+    }
+)
+_TASK_FILE_FORMATS_PARAMETER = MappingProxyType(
+    {
+        "name": "file_formats",
+        "description": "What kinds of files to fetch",
+        "required": False,
+        "input": "textarea",
+        "label": "File Formats (one per line):",
+    }
+)
+
+
+ENDPOINTS: Mapping[str, Mapping[str, Endpoint]] = {
     "locations": {
         "add": Endpoint(
             f"{NAVBAR['locations'].path}/add",
@@ -2161,22 +2380,18 @@ ENDPOINTS: dict[str, dict[str, Endpoint]] = {
             "Create a New Tag (you can create tags when tagging images too).",
             handler=TagsAddHandler,
             submit="Create",
-            parameters=[
-                {
-                    "name": "name",
-                    "description": "The name of the tag",
-                    "required": True,
-                    "input": "text",
-                    "label": "Name:",
-                },
-                {
-                    "name": "description",
-                    "description": "A description of the tag",
-                    "required": False,
-                    "input": "textarea",
-                    "label": "Description:",
-                },
-            ],
+            parameters=(
+                MappingProxyType(
+                    {
+                        "name": "name",
+                        "description": "The name of the tag",
+                        "required": True,
+                        "input": "text",
+                        "label": "Name:",
+                    }
+                ),
+                _TAG_DESCRIPTION_PARAMETER,
+            ),
         ),
         "": Endpoint(
             f"{NAVBAR['tags'].path}",
@@ -2192,73 +2407,43 @@ ENDPOINTS: dict[str, dict[str, Endpoint]] = {
             "Create a new image import task",
             handler=TasksAddHandler,
             submit="Create",
-            parameters=[
-                {
-                    "name": "name",
-                    "description": (
-                        "What to call your location. Location names must be unique."
-                    ),
-                    "required": True,
-                    "input": "text",
-                    "label": "Name:",
-                },
-                {
-                    "name": "source",
-                    "description": "Where to copy images from",
-                    "required": True,
-                    "input": "select",
-                    "label": "Source:",
-                },
-                {
-                    "name": "destination",
-                    "description": "Where to save images to",
-                    "required": True,
-                    "input": "select",
-                    "label": "Destination:",
-                },
-                {
-                    "name": "description",
-                    "description": "An explanation of what the task does",
-                    "required": False,
-                    "input": "textarea",
-                    "label": "Description:",
-                },
-                {
-                    "name": "creator",
-                    "description": "Who to list as the creator of imorted images",
-                    "required": False,
-                    "input": "text",
-                    "label": "Creator:",
-                },
-                {
-                    "name": "tags",
-                    "description": "What tags to apply to imported images",
-                    "required": False,
-                    "input": "textarea",
-                    "label": "Tags:",
-                },
-                {
-                    "name": "source_path",
-                    "description": "Where to look for images",
-                    "required": False,
-                    "input": "text",
-                    "label": "Source Path (relative to source root):",
-                },
-                {
-                    "name": "destination_format",
-                    "description": "Where to save copied images",
-                    "required": False,
-                    "input": "text",
-                    "label": "Destination Format (relative to source root):",
-                },
-                {
-                    "name": "file_formats",
-                    "description": "What kinds of files to fetch",
-                    "required": False,
-                    "input": "textarea",
-                    "label": "File Formats (one per line):",
-                },
-            ],
+            parameters=(
+                MappingProxyType(
+                    {
+                        "name": "name",
+                        "description": (
+                            "What to call your location. Location names must be unique."
+                        ),
+                        "required": True,
+                        "input": "text",
+                        "label": "Name:",
+                    }
+                ),
+                _TASK_SOURCE_PARAMETER,
+                _TASK_DESTINATION_PARAMETER,
+                MappingProxyType(
+                    {
+                        "name": "description",
+                        "description": "An explanation of what the task does",
+                        "required": False,
+                        "input": "textarea",
+                        "label": "Description:",
+                    }
+                ),
+                _TASK_CREATOR_PARAMETER,
+                MappingProxyType(
+                    {
+                        "name": "tags",
+                        "description": "What tags to apply to imported images",
+                        "required": False,
+                        "input": "textarea",
+                        "label": "Tags:",
+                    }
+                ),
+                _TASK_SOURCE_PATH_PARAMETER,
+                _TASK_DESTINATION_FORMAT_PARAMETER,
+                _TASK_FILE_FORMATS_PARAMETER,
+            ),
         ),
         "": Endpoint(
             f"{NAVBAR['tasks'].path}",
@@ -2270,7 +2455,7 @@ ENDPOINTS: dict[str, dict[str, Endpoint]] = {
 }
 
 
-ACTIONS: dict[str, dict[str, Endpoint]] = {
+ACTIONS: Mapping[str, Mapping[str, Endpoint]] = {
     "locations": {
         "get": Endpoint(
             f"{URL_BASE}/location/{{id}}",
@@ -2291,7 +2476,7 @@ ACTIONS: dict[str, dict[str, Endpoint]] = {
             "Unset the mount point for a location.",
             handler=LocationsUnmountHandler,
             submit="Unmount",
-            parameters=[],
+            parameters=(),
         ),
         "import": Endpoint(
             f"{URL_BASE}/location/{{id}}/import",
@@ -2304,39 +2489,49 @@ ACTIONS: dict[str, dict[str, Endpoint]] = {
             ),
             handler=LocationsImportHandler,
             submit="Import",
-            parameters=[
-                {
-                    "name": "creator",
-                    "description": "Who made the images being imported",
-                    "required": False,
-                    "input": "text",
-                    "label": "Creator:",
-                },
-                {
-                    "name": "tags",
-                    "description": "Tags to apply to all imported images.",
-                    "required": False,
-                    "input": "tags",
-                    "label": "Tags:",
-                },
-                {
-                    "name": "batch_size",
-                    "description": "Have PicPocket save changes after this many images",
-                    "required": False,
-                    "input": "number",
-                    "label": "Batch Size:",
-                },
-                {
-                    "name": "file_formats",
-                    "description": (
-                        "Only import files of these types. If not supplied, "
-                        "all of PicPocket's default file types will be included."
-                    ),
-                    "required": False,
-                    "input": "textarea",
-                    "label": "File Formats to install (one per line):",
-                },
-            ],
+            parameters=(
+                MappingProxyType(
+                    {
+                        "name": "creator",
+                        "description": "Who made the images being imported",
+                        "required": False,
+                        "input": "text",
+                        "label": "Creator:",
+                    }
+                ),
+                MappingProxyType(
+                    {
+                        "name": "tags",
+                        "description": "Tags to apply to all imported images.",
+                        "required": False,
+                        "input": "tags",
+                        "label": "Tags:",
+                    }
+                ),
+                MappingProxyType(
+                    {
+                        "name": "batch_size",
+                        "description": (
+                            "Have PicPocket save changes after this many images"
+                        ),
+                        "required": False,
+                        "input": "number",
+                        "label": "Batch Size:",
+                    }
+                ),
+                MappingProxyType(
+                    {
+                        "name": "file_formats",
+                        "description": (
+                            "Only import files of these types. If not supplied, "
+                            "all of PicPocket's default file types will be included."
+                        ),
+                        "required": False,
+                        "input": "textarea",
+                        "label": "File Formats to install (one per line):",
+                    }
+                ),
+            ),
         ),
         "edit": Endpoint(
             f"{URL_BASE}/location/{{id}}/edit",
@@ -2351,18 +2546,20 @@ ACTIONS: dict[str, dict[str, Endpoint]] = {
             "Remove a location from PicPocket (your files will not be touched).",
             handler=LocationsRemoveHandler,
             submit="Remove",
-            parameters=[
-                {
-                    "name": "force",
-                    "description": (
-                        "Remove the location even if images exist at this "
-                        "location in PicPocket. Image files will not be touched."
-                    ),
-                    "required": False,
-                    "input": "checkbox",
-                    "label": "Force (remove associated images from PicPocket):",
-                },
-            ],
+            parameters=(
+                MappingProxyType(
+                    {
+                        "name": "force",
+                        "description": (
+                            "Remove the location even if images exist at this "
+                            "location in PicPocket. Image files will not be touched."
+                        ),
+                        "required": False,
+                        "input": "checkbox",
+                        "label": "Force (remove associated images from PicPocket):",
+                    }
+                ),
+            ),
         ),
     },
     "images": {
@@ -2392,15 +2589,17 @@ ACTIONS: dict[str, dict[str, Endpoint]] = {
             "Remove an image from PicPocket.",
             handler=ImagesRemoveHandler,
             submit="Remove",
-            parameters=[
-                {
-                    "name": "delete",
-                    "description": "Delete the image file",
-                    "required": False,
-                    "input": "checkbox",
-                    "label": "Delete:",
-                },
-            ],
+            parameters=(
+                MappingProxyType(
+                    {
+                        "name": "delete",
+                        "description": "Delete the image file",
+                        "required": False,
+                        "input": "checkbox",
+                        "label": "Delete:",
+                    }
+                ),
+            ),
         ),
         "file": Endpoint(
             f"{URL_BASE}/file/{{id}}",
@@ -2429,15 +2628,7 @@ ACTIONS: dict[str, dict[str, Endpoint]] = {
             "Edit the description of a tag.",
             handler=TagsEditHandler,
             submit="edit",
-            parameters=[
-                {
-                    "name": "description",
-                    "description": "A description of the tag",
-                    "required": False,
-                    "input": "textarea",
-                    "label": "Description:",
-                },
-            ],
+            parameters=(_TAG_DESCRIPTION_PARAMETER,),
         ),
         "remove": Endpoint(
             f"{URL_BASE}/tag/remove",
@@ -2445,15 +2636,17 @@ ACTIONS: dict[str, dict[str, Endpoint]] = {
             "Remove a tag form PicPocket.",
             handler=TagsRemoveHandler,
             submit="remove",
-            parameters=[
-                {
-                    "name": "cascade",
-                    "description": "Delete all descendents too",
-                    "required": False,
-                    "input": "checkbox",
-                    "label": "Cascade:",
-                },
-            ],
+            parameters=(
+                MappingProxyType(
+                    {
+                        "name": "cascade",
+                        "description": "Delete all descendents too",
+                        "required": False,
+                        "input": "checkbox",
+                        "label": "Cascade:",
+                    }
+                ),
+            ),
         ),
     },
     "tasks": {
@@ -2477,29 +2670,35 @@ ACTIONS: dict[str, dict[str, Endpoint]] = {
             ),
             handler=TasksRunHandler,
             submit="run",
-            parameters=[
-                {
-                    "name": "since",
-                    "description": "Only import images since this date",
-                    "required": False,
-                    "input": "datetime-local",
-                    "label": "Since:",
-                },
-                {
-                    "name": "full",
-                    "description": "Ignore since/last-ran date when importing",
-                    "required": False,
-                    "input": "checkbox",
-                    "label": "Full:",
-                },
-                {
-                    "name": "tags",
-                    "description": "Tags to apply to all imported images",
-                    "required": False,
-                    "input": "tags",
-                    "label": "Tags:",
-                },
-            ],
+            parameters=(
+                MappingProxyType(
+                    {
+                        "name": "since",
+                        "description": "Only import images since this date",
+                        "required": False,
+                        "input": "datetime-local",
+                        "label": "Since:",
+                    }
+                ),
+                MappingProxyType(
+                    {
+                        "name": "full",
+                        "description": "Ignore since/last-ran date when importing",
+                        "required": False,
+                        "input": "checkbox",
+                        "label": "Full:",
+                    }
+                ),
+                MappingProxyType(
+                    {
+                        "name": "tags",
+                        "description": "Tags to apply to all imported images",
+                        "required": False,
+                        "input": "tags",
+                        "label": "Tags:",
+                    }
+                ),
+            ),
         ),
         "edit": Endpoint(
             f"{URL_BASE}/task/{{name}}/edit",
@@ -2507,64 +2706,32 @@ ACTIONS: dict[str, dict[str, Endpoint]] = {
             "Edit a task",
             handler=TasksEditHandler,
             submit="Edit",
-            parameters=[
-                {
-                    "name": "source",
-                    "description": "Where to copy images from",
-                    "required": True,
-                    "input": "select",
-                    "label": "Source:",
-                },
-                {
-                    "name": "destination",
-                    "description": "Where to save images to",
-                    "required": True,
-                    "input": "select",
-                    "label": "Destination:",
-                },
-                {
-                    "name": "description",
-                    "description": "A description of the task",
-                    "required": False,
-                    "input": "textarea",
-                    "label": "Description:",
-                },
-                {
-                    "name": "creator",
-                    "description": "Who to list as the creator of imorted images",
-                    "required": False,
-                    "input": "text",
-                    "label": "Creator:",
-                },
-                {
-                    "name": "tags",
-                    "description": "What to tag imorted images",
-                    "required": False,
-                    "input": "textarea",
-                    "label": "Tags:",
-                },
-                {
-                    "name": "source_path",
-                    "description": "Where to look for images",
-                    "required": False,
-                    "input": "text",
-                    "label": "Source Path (relative to source root):",
-                },
-                {
-                    "name": "destination_format",
-                    "description": "Where to save copied images",
-                    "required": False,
-                    "input": "text",
-                    "label": "Destination Format (relative to source root):",
-                },
-                {
-                    "name": "file_formats",
-                    "description": "What kinds of files to fetch",
-                    "required": False,
-                    "input": "textarea",
-                    "label": "File Formats (one per line):",
-                },
-            ],
+            parameters=(
+                _TASK_SOURCE_PARAMETER,
+                _TASK_DESTINATION_PARAMETER,
+                MappingProxyType(
+                    {
+                        "name": "description",
+                        "description": "A description of the task",
+                        "required": False,
+                        "input": "textarea",
+                        "label": "Description:",
+                    }
+                ),
+                _TASK_CREATOR_PARAMETER,
+                MappingProxyType(
+                    {
+                        "name": "tags",
+                        "description": "What to tag imorted images",
+                        "required": False,
+                        "input": "textarea",
+                        "label": "Tags:",
+                    }
+                ),
+                _TASK_SOURCE_PATH_PARAMETER,
+                _TASK_DESTINATION_FORMAT_PARAMETER,
+                _TASK_FILE_FORMATS_PARAMETER,
+            ),
         ),
         "remove": Endpoint(
             f"{URL_BASE}/task/{{name}}/remove",
@@ -2576,148 +2743,239 @@ ACTIONS: dict[str, dict[str, Endpoint]] = {
     },
 }
 
-REPLACEMENTS: dict[str, dict[str, str]] = {
+REPLACEMENTS: Mapping[str, Mapping[str, str]] = {
     "images": {"id": r"([^/]+)"},
     "locations": {"id": r"([^/]+)"},
     "tags": {},
     "tasks": {"name": r"([^/]+)"},
 }
 
+# the endpoint tables are shared by every app, so make them read-only
+NAVBAR = MappingProxyType(NAVBAR)
+ENDPOINTS = MappingProxyType(
+    {group: MappingProxyType(endpoints) for group, endpoints in ENDPOINTS.items()}
+)
+ACTIONS = MappingProxyType(
+    {group: MappingProxyType(endpoints) for group, endpoints in ACTIONS.items()}
+)
+REPLACEMENTS = MappingProxyType(
+    {group: MappingProxyType(paths) for group, paths in REPLACEMENTS.items()}
+)
 
-def make_app(
-    picpocket: PicPocket,
-    *,
-    suggestions: Suggestions,
-    local_actions: bool = False,
-) -> Application:
-    """Make a tornado Application with all expected routing
+
+def _split_lines(text: Optional[str]) -> list[str]:
+    """Split a multi-line form value, skipping blank lines"""
+    if not text:
+        return []
+
+    return [line for line in (part.strip() for part in text.splitlines()) if line]
+
+
+def _compile_path(path: str) -> re.Pattern[str]:
+    """Compile a route's path the same way tornado would.
+
+    Passing compiled patterns to URLSpec means they are only compiled
+    once, rather than once per app.
 
     Args:
-        picpocket: The API
-        suggestions: Information on how to give suggestions
-        local_actions: Include endpoints designed for people only
-            accessing PicPocket from their local machine.
+        path: The route's regex
 
     Returns:
-        An instantiated tornado Application
+        The compiled regex, anchored at the end
     """
-    # tornado is expecting optional list, not optional sequence and in
-    # python lists are invariant, so we can't just pass list[Rule].
-    # we could pass sequence[Rule] but we want to optionally call
-    # append, which sequences don't have. oh well
-    routes: list[
-        tornado.routing.Rule
-        | list[Any]
-        | tuple[str | tornado.routing.Matcher, Any]
-        | tuple[str | tornado.routing.Matcher, Any, dict[str, Any]]
-        | tuple[str | tornado.routing.Matcher, Any, dict[str, Any], str]
-    ] = [
-        tornado.web.url(r"/style\.css", StyleHandler),
-        tornado.web.url(r"/scripts\.js", ScriptHandler),
-        tornado.web.url(r"/", RootHandler, name="root"),
-    ]
-
-    special_actions = {}
-    if local_actions:
-        match sys.platform:
-            case "darwin":
-                special_actions["show-file"] = "Show in Finder"
-                routes.append(
-                    tornado.web.url(
-                        rf"{URL_BASE}/show-in-finder/(\d+)",
-                        ShowInFinderHandler,
-                        {"picpocket": picpocket},
-                        name="show-file",
-                    )
-                )
+    if not path.endswith("$"):
+        path += "$"
+
+    return re.compile(path)
+
+
+class RouteTemplate(NamedTuple):
+    """A route, minus the per-app handler kwargs
+
+    Routes without an endpoint take no handler kwargs.
+    """
+
+    path: re.Pattern[str]
+    handler: type[RequestHandler]
+    endpoint: Optional[Endpoint]
+    name: Optional[str]
 
-                special_actions["choose-file"] = "Choose File"
-                routes.append(
-                    tornado.web.url(
-                        rf"{URL_BASE}/macos-file-dialog/(\w+)/(.*)/(.*)",
-                        AppleScriptDialogHandler,
-                        {"picpocket": picpocket},
-                        name="choose-file",
-                    )
-                )
+
+def _build_route_templates() -> tuple[RouteTemplate, ...]:
+    """Flatten the endpoint tables into the app's routes.
+
+    Routes are the same for every app, only the kwargs passed to the
+    handlers differ, so this only needs to be done once.
+
+    Returns:
+        The routes, in the order they should be registered
+    """
+    templates: list[RouteTemplate] = []
 
     for group, group_endpoint in NAVBAR.items():
         if group_endpoint.handler:
-            routes.append(
-                tornado.web.url(
-                    f"{group_endpoint.path}/",
-                    group_endpoint.handler,
-                )
-            )
-            routes.append(
-                tornado.web.url(
-                    f"{group_endpoint.path}",
+            templates.append(
+                RouteTemplate(
+                    _compile_path(group_endpoint.path),
                     group_endpoint.handler,
-                    name=group,
+                    None,
+                    group,
                 )
             )
 
         if group in ENDPOINTS:
             for name, endpoint in ENDPOINTS[group].items():
                 if endpoint.handler:
-                    routes.append(
-                        tornado.web.url(
-                            f"{endpoint.path}/",
+                    templates.append(
+                        RouteTemplate(
+                            _compile_path(endpoint.path),
                             endpoint.handler,
-                            {
-                                "endpoint": endpoint,
-                                "picpocket": picpocket,
-                                "local_actions": special_actions,
-                                "suggestions": suggestions,
-                            },
-                        )
-                    )
-                    routes.append(
-                        tornado.web.url(
-                            endpoint.path,
-                            endpoint.handler,
-                            {
-                                "endpoint": endpoint,
-                                "picpocket": picpocket,
-                                "local_actions": special_actions,
-                                "suggestions": suggestions,
-                            },
-                            name=f"{group}-{name}" if name else group,
+                            endpoint,
+                            f"{group}-{name}" if name else group,
                         )
                     )
 
         if group in ACTIONS:
+            replacements = REPLACEMENTS[group]
             for name, endpoint in ACTIONS[group].items():
                 if endpoint.handler:
-                    routes.append(
-                        tornado.web.url(
-                            f"{endpoint.path.format(**REPLACEMENTS[group])}/",
-                            endpoint.handler,
-                            {
-                                "endpoint": endpoint,
-                                "picpocket": picpocket,
-                                "local_actions": special_actions,
-                                "suggestions": suggestions,
-                            },
-                        )
-                    )
-                    routes.append(
-                        tornado.web.url(
-                            endpoint.path.format(**REPLACEMENTS[group]),
+                    templates.append(
+                        RouteTemplate(
+                            _compile_path(endpoint.compiled_path(replacements)),
                             endpoint.handler,
-                            {
-                                "endpoint": endpoint,
-                                "picpocket": picpocket,
-                                "local_actions": special_actions,
-                                "suggestions": suggestions,
-                            },
-                            name=f"{group}-{name}",
+                            endpoint,
+                            f"{group}-{name}",
                         )
                     )
 
-    return Application(
-        routes,
+    return tuple(templates)
+
+
+_ROUTE_TEMPLATES = _build_route_templates()
+
+# routes that don't take per-app handler kwargs can be shared by every
+# app instead of being rebuilt (and recompiled) each time
+_STATIC_ROUTES: tuple[URLSpec, ...] = (
+    URLSpec(r"/style\.css", StyleHandler),
+    URLSpec(r"/scripts\.js", ScriptHandler),
+    URLSpec(r"/", RootHandler, name="root"),
+    *(
+        URLSpec(template.path, template.handler, name=template.name)
+        for template in _ROUTE_TEMPLATES
+        if template.endpoint is None
+    ),
+)
+
+# routes are only registered without a trailing slash. this goes last so
+# it only catches requests that didn't match anything else
+_TRAILING_SLASH_ROUTE = URLSpec(r"(.+)/", TrailingSlashHandler)
+_ENDPOINT_ROUTES = tuple(
+    template for template in _ROUTE_TEMPLATES if template.endpoint is not None
+)
+
+# actions that only make sense when accessing PicPocket from the machine
+# it's running on. the available actions depend on the platform.
+_NO_LOCAL_ACTIONS: Mapping[str, str] = MappingProxyType({})
+_LOCAL_ACTIONS: Mapping[str, str]
+_LOCAL_ACTION_ROUTES: tuple[tuple[re.Pattern[str], type[RequestHandler], str], ...]
+match sys.platform:
+    case "darwin":
+        _LOCAL_ACTIONS = MappingProxyType(
+            {"show-file": "Show in Finder", "choose-file": "Choose File"}
+        )
+        _LOCAL_ACTION_ROUTES = (
+            (
+                _compile_path(rf"{URL_BASE}/show-in-finder/(\d+)"),
+                ShowInFinderHandler,
+                "show-file",
+            ),
+            (
+                _compile_path(rf"{URL_BASE}/macos-file-dialog/(\w+)/(.*)/(.*)"),
+                AppleScriptDialogHandler,
+                "choose-file",
+            ),
+        )
+    case _:
+        _LOCAL_ACTIONS = _NO_LOCAL_ACTIONS
+        _LOCAL_ACTION_ROUTES = ()
+
+
+def _iter_routes(
+    picpocket: PicPocket,
+    suggestions: Suggestions,
+    special_actions: Mapping[str, str],
+) -> Iterator[URLSpec]:
+    """Generate the routes for an app
+
+    Args:
+        picpocket: The API
+        suggestions: Information on how to give suggestions
+        special_actions: The local actions the app supports
+
+    Returns:
+        The app's routes
+    """
+    yield from _STATIC_ROUTES
+
+    if special_actions:
+        local_kwargs = {"picpocket": picpocket}
+        for pattern, handler, action in _LOCAL_ACTION_ROUTES:
+            yield URLSpec(pattern, handler, local_kwargs, name=action)
+
+    for path, handler, endpoint, name in _ENDPOINT_ROUTES:
+        yield URLSpec(
+            path,
+            handler,
+            {
+                "endpoint": endpoint,
+                "picpocket": picpocket,
+                "local_actions": special_actions,
+                "suggestions": suggestions,
+            },
+            name=name,
+        )
+
+    yield _TRAILING_SLASH_ROUTE
+
+
+# applications are reusable, so repeated calls with the same arguments share
+# one. Routes hold a reference to the API, so an entry (and the id in its key)
+# stays valid for exactly as long as its application is alive.
+_APPLICATIONS: WeakValueDictionary[
+    tuple[int, Suggestions, bool], Application
+] = WeakValueDictionary()
+
+
+def make_app(
+    picpocket: PicPocket,
+    *,
+    suggestions: Suggestions,
+    local_actions: bool = False,
+) -> Application:
+    """Make a tornado Application with all expected routing
+
+    Args:
+        picpocket: The API
+        suggestions: Information on how to give suggestions
+        local_actions: Include endpoints designed for people only
+            accessing PicPocket from their local machine.
+
+    Returns:
+        A tornado Application. Calls with the same arguments share one.
+    """
+    key = (id(picpocket), suggestions, local_actions)
+    application = _APPLICATIONS.get(key)
+    if application is not None:
+        return application
+
+    special_actions = _LOCAL_ACTIONS if local_actions else _NO_LOCAL_ACTIONS
+
+    application = Application(
+        list(_iter_routes(picpocket, suggestions, special_actions)),
         template_path=TEMPLATE_DIRECTORY,
+        template_loader=TEMPLATE_LOADER,
+        # result pages embed every matching id, so they can get large
+        transforms=[GZipTransform],
         ui_modules={
             "DisplayLocation": LocationDisplayHandler,
             "DisplayImage": ImageDisplayHandler,
@@ -2726,6 +2984,9 @@ def make_app(
             "NavBar": NavBarHandler,
         },
     )
+    _APPLICATIONS[key] = application
+
+    return application
 
 
 async def run_server(
@@ -2757,5 +3018,10 @@ async def run_server(
         local_actions=local_actions,
         suggestions=Suggestions(suggestions, suggestion_lookback),
     )
-    application.listen(port)
-    await shutdown.wait()
+    async with picpocket.connection_pool():
+        server = application.listen(port)
+        try:
+            await shutdown.wait()
+        finally:
+            # free the port when cancelled
+            server.stop()
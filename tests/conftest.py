@@ -1,23 +1,28 @@
 import asyncio
 import json
 import os
-import re
+import socket
 from argparse import ArgumentParser
-from contextlib import asynccontextmanager, contextmanager
-from multiprocessing import Process
+from contextlib import asynccontextmanager, contextmanager, suppress
+from functools import cache
 from pathlib import Path
 from subprocess import check_call, check_output
 from tempfile import TemporaryDirectory
+from threading import Event, Thread
 from time import sleep, time
 from typing import Any, AsyncGenerator, Callable, Iterator, Optional
 
 import pytest  # type: ignore
-import requests
 
 DIRECTORY = Path(__file__).parent.absolute()
 CONFIG = DIRECTORY / "pg-config.json"
 
 CURRENT_CONTAINER = None
+# a connection to the test database for resetting it between tests
+ADMIN_CONNECTION: Any = None
+# config files written when initializing the test database, by whether
+# credentials were stored, so later tests can reuse the schema
+_CONFIG_TEMPLATES: dict[bool, str] = {}
 
 TEST_IMAGES = Path(__file__).parent / "images"
 IMAGE_FILES = [
@@ -97,36 +102,102 @@ def run_web() -> Callable:
         port = 8000
 
         async with _load_api() as api:
-            process = Process(target=_run_web, args=(port, api.configuration.directory))
-
-            process.start()
-
-            timeout = time() + 2
-            while time() < timeout:
-                try:
-                    requests.get(f"http://localhost:{port}")
-                    break
-                except Exception:
-                    sleep(0.1)
-            else:
-                raise ValueError("server failed to come up")
+            server = _WebServer(port, api.configuration.directory)
+            server.start()
 
             try:
+                if not _wait_until(lambda: _accepting_connections(port), 2):
+                    raise ValueError("server failed to come up")
+
                 yield port
             finally:
-                process.terminate()
+                server.stop()
 
     return run
 
 
-def _run_web(port: int, directory: Path):
-    from picpocket import load
-    from picpocket.web import run_server
+def _wait_until(
+    predicate: Callable[[], bool],
+    timeout: float,
+    *,
+    initial: float = 0.01,
+    cap: float = 0.2,
+) -> bool:
+    """Poll until a condition holds, backing off exponentially
+
+    Quick checks are retried quickly, slow ones settle to one poll
+    per cap seconds.
+
+    Returns:
+        Whether the condition held before the timeout
+    """
+    deadline = time() + timeout
+    delay = initial
+
+    while True:
+        if predicate():
+            return True
+
+        if time() >= deadline:
+            return False
+
+        sleep(delay)
+        delay = min(delay * 2, cap)
+
+
+def _accepting_connections(port: int) -> bool:
+    """Check whether something is listening on a local port"""
+    try:
+        with socket.create_connection(("localhost", port), timeout=0.05):
+            return True
+    except OSError:
+        return False
+
+
+class _WebServer(Thread):
+    """Run the web server on its own event loop in a background thread
 
-    api = load(directory)
+    Tests make blocking requests, so the server can't share their loop,
+    but a thread is much cheaper to start than a process.
+    """
+
+    def __init__(self, port: int, directory: Path):
+        super().__init__(daemon=True)
+        self.port = port
+        self.directory = directory
+        self._started = Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def run(self):
+        from picpocket import load
+        from picpocket.web import run_server
+
+        async def serve():
+            # loaded separately so the server doesn't share the test's caches
+            api = load(self.directory)
+
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+            self._started.set()
+
+            await run_server(api, self.port)
+
+        try:
+            with asyncio.Runner() as runner, suppress(asyncio.CancelledError):
+                runner.run(serve())
+        finally:
+            # don't leave stop() waiting if the server never started
+            self._started.set()
+
+    def stop(self):
+        self._started.wait()
+        # the loop is already closed if the server stopped by itself
+        if self._loop and self._task and not self._loop.is_closed():
+            with suppress(RuntimeError):
+                self._loop.call_soon_threadsafe(self._task.cancel)
 
-    with asyncio.Runner() as runner:
-        runner.run(run_server(api, port))
+        self.join()
 
 
 @pytest.fixture
@@ -167,21 +238,36 @@ async def _load_api(
 
         match backend:
             case "postgres":
-                with _get_pg_connection_info() as connection_info:
-                    import psycopg
-
+                with _get_pg_connection_info(wipe=False) as connection_info:
                     if wipe:
-                        async with await psycopg.AsyncConnection.connect(
-                            **connection_info  # type: ignore
-                        ) as connection:
-                            await _wipe_async(connection)
-
-                        yield await initialize(
-                            directory,
-                            "postgres",
-                            store_credentials=store_credentials,
-                            **connection_info,
-                        )
+                        template = _CONFIG_TEMPLATES.get(store_credentials)
+
+                        # emptying existing tables is much quicker than
+                        # dropping and recreating the schema
+                        reset = template is not None and _reset(connection_info)
+                        if not reset:
+                            _wipe(connection_info)
+
+                        if template is not None and reset:
+                            from picpocket import load
+                            from picpocket.configuration import CONFIG_FILE
+
+                            (directory / CONFIG_FILE).write_text(template)
+                            password = str(connection_info.get("password") or "")
+
+                            yield load(directory, prompt=lambda: password)
+                        else:
+                            api = await initialize(
+                                directory,
+                                "postgres",
+                                store_credentials=store_credentials,
+                                **connection_info,
+                            )
+                            _CONFIG_TEMPLATES[
+                                store_credentials
+                            ] = api.configuration.file.read_text()
+
+                            yield api
             case "sqlite":
                 yield await initialize(directory, "sqlite")
             case _:
@@ -206,7 +292,7 @@ def create_parser() -> Callable[[str], tuple[ArgumentParser, Any]]:
 
 
 @contextmanager
-def _get_pg_connection_info() -> Iterator[dict[str, str | int]]:
+def _get_pg_connection_info(wipe: bool = True) -> Iterator[dict[str, str | int]]:
     if os.environ["PICPOCKET_BACKEND"] != "postgres":
         pytest.skip("skipping postgres tests")
 
@@ -226,7 +312,9 @@ def _get_pg_connection_info() -> Iterator[dict[str, str | int]]:
             if not config["dbname"].startswith("test"):
                 pytest.skip("Refusing to run against a DB not named test...")
 
-            _wipe(config)
+            if wipe:
+                _wipe(config)
+
             yield config
         case "docker" | "isolated":
             if not config["dbname"].startswith("test"):
@@ -244,7 +332,9 @@ def _get_pg_connection_info() -> Iterator[dict[str, str | int]]:
             else:
                 container = start_container(image, config["port"], config)
 
-            _wipe(config)
+            if wipe:
+                _wipe(config)
+
             yield config
 
             if strategy == "isolated":
@@ -261,31 +351,38 @@ def start_container(image: str, port: int, connection_info=None) -> str:
     ).strip()
     check_call(("docker", "start", container))
     CURRENT_CONTAINER = container
-    timeout = time() + 5
-    while time() < timeout:
-        if check_output(("docker", "ps", "--filter", f"id={container}", "--quiet")):
-            break
-    else:
+
+    def running() -> bool:
+        return bool(
+            check_output(("docker", "ps", "--filter", f"id={container}", "--quiet"))
+        )
+
+    if not _wait_until(running, 5):
         print(f"container {container} didn't come up in time")
 
     if connection_info:
         import psycopg
 
-        timeout = time() + 10
-        while time() < timeout:
+        def connectable() -> bool:
             try:
-                psycopg.Connection.connect(**connection_info)
-                break
+                psycopg.Connection.connect(**connection_info).close()
             except Exception:
-                sleep(0.1)
-        else:
+                return False
+
+            return True
+
+        if not _wait_until(connectable, 10):
             print("db probably didn't come up in time")
+
     return container
 
 
 def delete_container(container: str):
     global CURRENT_CONTAINER
 
+    # the container's database is going away with it
+    _close_admin_connection()
+
     if check_output(("docker", "ps", "--filter", f"id={container}", "--quiet")):
         check_call(("docker", "stop", container))
 
@@ -298,52 +395,109 @@ def delete_container(container: str):
         CURRENT_CONTAINER = None
 
 
-def _wipe(connection_info):
-    import psycopg
+@cache
+def _wipe_statements() -> tuple[Any, ...]:
+    """Build the statements that drop everything PicPocket creates
+
+    Each statement drops all its tables/types at once, so wiping only
+    takes one round trip per statement rather than one per name.
+    """
+    from psycopg.sql import SQL
 
     from picpocket.database.postgres import _get_tables, _get_types
 
-    with (
-        psycopg.Connection.connect(**connection_info) as connection,
-        connection.cursor() as cursor,
-    ):
-        # remove tables
-        for table in _get_tables():
-            # TODO: does psycopg.sql.SQL & .Identifier not work here?
-            # in the mean time do a quick check on custom_type
-            re.search(r"^[a-z0-9_]+$", table)
+    statements = []
+    for kind, names in (("TABLE", _get_tables()), ("TYPE", _get_types())):
+        if names:
+            statements.append(
+                SQL(f"DROP {kind} IF EXISTS {{}} CASCADE;").format(_names(names))
+            )
 
-            cursor.execute(f"DROP TABLE IF EXISTS {table} CASCADE;")
+    return tuple(statements)
 
-        # remove types
-        for custom_type in _get_types():
-            # TODO: does psycopg.sql.SQL & .Identifier not work here?
-            # in the mean time do a quick check on custom_type
-            re.search(r"^[a-z0-9_]+$", custom_type)
 
-            cursor.execute(f"DROP TYPE IF EXISTS {custom_type} CASCADE;")
+@cache
+def _reset_statement() -> Any:
+    """Build the statement that empties every PicPocket table"""
+    from psycopg.sql import SQL
 
-        connection.commit()
+    from picpocket.database.postgres import _get_tables
 
+    return SQL("TRUNCATE {} RESTART IDENTITY CASCADE;").format(_names(_get_tables()))
 
-async def _wipe_async(connection):
-    from picpocket.database.postgres import _get_tables, _get_types
 
-    async with connection.cursor() as cursor:
-        # remove tables
-        for table in _get_tables():
-            # TODO: does psycopg.sql.SQL & .Identifier not work here?
-            # in the mean time do a quick check on custom_type
-            assert re.search(r"^[a-z0-9_]+$", table)
+def _names(names: set[str]) -> Any:
+    """Quote a set of table/type names as a comma-separated list"""
+    from psycopg.sql import SQL, Identifier
+
+    return SQL(", ").join(Identifier(name) for name in sorted(names))
+
+
+def _admin_connection(connection_info) -> Any:
+    """Get the connection used to reset the test database
+
+    One autocommitting connection is kept open and shared by every
+    reset/wipe, rather than connecting again for each test.
+    """
+    global ADMIN_CONNECTION
+
+    import psycopg
+
+    if ADMIN_CONNECTION is None or ADMIN_CONNECTION.closed or ADMIN_CONNECTION.broken:
+        ADMIN_CONNECTION = psycopg.Connection.connect(
+            **connection_info, autocommit=True
+        )
+
+    return ADMIN_CONNECTION
+
 
-            await cursor.execute(f"DROP TABLE IF EXISTS {table} CASCADE;")
+def _close_admin_connection():
+    global ADMIN_CONNECTION
 
-        # remove types
-        for custom_type in _get_types():
-            # TODO: does psycopg.sql.SQL & .Identifier not work here?
-            # in the mean time do a quick check on custom_type
-            assert re.search(r"^[a-z0-9_]+$", custom_type)
+    if ADMIN_CONNECTION is not None:
+        ADMIN_CONNECTION.close()
+        ADMIN_CONNECTION = None
+
+
+def _reset(connection_info) -> bool:
+    """Empty the database, if it already has PicPocket's full schema
+
+    Returns:
+        Whether the database was reset. If not, it needs wiping and
+        initializing instead.
+    """
+    from picpocket.database.postgres import SCHEMA_VERSION, _get_tables, _get_types
 
-            await cursor.execute(f"DROP TYPE IF EXISTS {custom_type} CASCADE;")
+    tables = _get_tables()
+    types = _get_types()
 
-    await connection.commit()
+    connection = _admin_connection(connection_info)
+    with connection.transaction(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM pg_tables WHERE tablename = ANY(%s);",
+            (list(tables),),
+        )
+        (table_count,) = cursor.fetchone()
+
+        cursor.execute(
+            "SELECT COUNT(*) FROM pg_type WHERE typname = ANY(%s);",
+            (list(types),),
+        )
+        (type_count,) = cursor.fetchone()
+
+        if table_count != len(tables) or type_count != len(types):
+            return False
+
+        cursor.execute(_reset_statement())
+        # some tests add versions of their own
+        cursor.execute("INSERT INTO version (version) VALUES (%s);", (SCHEMA_VERSION,))
+
+    return True
+
+
+def _wipe(connection_info):
+    connection = _admin_connection(connection_info)
+    with connection.transaction(), connection.cursor() as cursor:
+        # tables first, they depend on the types
+        for statement in _wipe_statements():
+            cursor.execute(statement)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 import shutil
@@ -267,6 +268,7 @@ async def test_remove_location(load_api, tmp_path, image_files):
 @pytest.mark.asyncio
 async def test_list_locations(load_api, tmp_path):
     from picpocket.database.types import Location
+    from picpocket.errors import InputValidationError
 
     async with load_api() as api:
         assert await api.list_locations() == []
@@ -288,6 +290,11 @@ async def test_list_locations(load_api, tmp_path):
         )
 
         assert await api.list_locations() in ([main, camera], [camera, main])
+        assert await api.list_locations(order=("name",)) == [camera, main]
+        assert await api.list_locations(order=("-name",)) == [main, camera]
+
+        with pytest.raises(InputValidationError):
+            await api.list_locations(order=("unknown",))
 
         # respect mount points
         camera, main = sorted(
@@ -1090,6 +1097,29 @@ async def test_edit_image(load_api, tmp_path, image_files):
         assert images[1].id == max_id
         assert images[1].rating is None
 
+        # tags only
+        await api.edit_image(min_id, add_tags=["a", "b/c"])
+        image = await api.get_image(min_id, tags=True)
+        assert image.caption == "first image"
+        assert sorted(image.tags) == ["a", "b/c"]
+
+        # fields and tags together
+        await api.edit_image(
+            min_id, rating=3, add_tags=["d"], remove_tags=["a", "missing"]
+        )
+        image = await api.get_image(min_id, tags=True)
+        assert image.rating == 3
+        assert sorted(image.tags) == ["b/c", "d"]
+
+        # failed edits shouldn't partially apply
+        with pytest.raises(Exception):
+            await api.edit_image(min_id, remove_tags=["d"], add_tags=["/bad/"])
+        image = await api.get_image(min_id, tags=True)
+        assert sorted(image.tags) == ["b/c", "d"]
+
+        with pytest.raises(Exception):
+            await api.edit_image(max_id + 1, add_tags=["a"])
+
 
 @pytest.mark.asyncio
 async def test_tag_untag_image(load_api, tmp_path, image_files):
@@ -2201,6 +2231,12 @@ async def test_tags(load_api, tmp_path, image_files):
             "nested/tag/further",
             "nested/tag/much/much/further",
         ]
+
+        # tag names are cached, but changes should still show up
+        await api.add_tag("added")
+        assert "added" in await api.all_tag_names()
+        await api.remove_tag("added")
+        assert "added" not in await api.all_tag_names()
         assert sorted((await api.get_image(id, tags=True)).tags) == [
             "nested/tag",
             "nested/tag/much/much/further",
@@ -2258,6 +2294,39 @@ async def test_tags(load_api, tmp_path, image_files):
         assert (await api.get_image(id, tags=True)).tags == []
 
 
+@pytest.mark.asyncio
+async def test_tag_names_uncommitted(load_api, tmp_path, image_files, monkeypatch):
+    async with load_api() as api, api.connection_pool(size=2):
+        directory = tmp_path / "location"
+        directory.mkdir()
+        await api.add_location("location", directory, destination=True)
+        image_id = await api.add_image_copy(image_files[0], "location", "image.jpg")
+
+        assert await api.all_tag_names() == set()
+
+        # read the tag names while each write is still uncommitted
+        add_tag = api._add_tag
+        seen = []
+
+        async def add_then_read(cursor, tag, *args, **kwargs):
+            tag_id = await add_tag(cursor, tag, *args, **kwargs)
+            seen.append(tag in await api.all_tag_names())
+            return tag_id
+
+        monkeypatch.setattr(api, "_add_tag", add_then_read)
+
+        await api.add_tag("added")
+        await api.tag_image(image_id, "tagged")
+        await api.edit_image(image_id, add_tags=["edited"])
+        await api.add_image_copy(
+            image_files[1], "location", "other.jpg", tags=["copied"]
+        )
+
+        # the reads were too early, but what they saw mustn't stick
+        assert seen == [False, False, False, False]
+        assert await api.all_tag_names() == {"added", "tagged", "edited", "copied"}
+
+
 @pytest.mark.asyncio
 async def test_move_tag(load_api, tmp_path, image_files):
     async with load_api() as api:
@@ -2689,6 +2758,14 @@ async def test_tag_sets(load_api, tmp_path, image_files):
 
         assert await api.get_tag_set(*images, minimum=2) == {"a/b": 2, "a/c": 3}
 
+        # limits keep the most-applied tags
+        tag_set = await api.get_tag_set(*images, limit=2)
+        assert tag_set == {"a/b": 2, "a/c": 3}
+        assert list(tag_set) == ["a/c", "a/b"]
+
+        assert await api.get_tag_set(*images, minimum=3, limit=2) == {"a/c": 3}
+        assert await api.get_tag_set(*images, limit=0) == {}
+
 
 @pytest.mark.asyncio
 async def test_import_export(load_api, tmp_path, image_files):
@@ -3166,6 +3243,11 @@ async def test_session(load_api):
 
         assert await api.get_session(id) == data
 
+        # modifying fetched data shouldn't change the session
+        fetched = await api.get_session(id)
+        fetched["b"].append("extra")
+        assert await api.get_session(id) == data
+
         # if you set the default expiry to less than a second you deserve
         # for this test to fail
         await api.prune_sessions()
@@ -3191,3 +3273,36 @@ async def test_session(load_api):
 
         assert await api.get_session(id) == data
         assert await api.get_session(new_id) is None
+
+
+@pytest.mark.asyncio
+async def test_connection_pool(load_api, tmp_path, image_files):
+    async with load_api() as api:
+        async with api.connection_pool(size=2):
+            # only one pool at a time
+            with pytest.raises(ValueError):
+                async with api.connection_pool():
+                    pass
+
+            location = await api.add_location("main", tmp_path, destination=True)
+            shutil.copy2(image_files[0], tmp_path / "a.jpg")
+            await api.import_location(location)
+            image = await api.find_image(tmp_path / "a.jpg")
+
+            # more concurrent calls than pooled connections
+            locations = await asyncio.gather(
+                *(api.get_location(location) for _ in range(5))
+            )
+            assert {location.name for location in locations} == {"main"}
+            assert api._pool.idle == 2
+
+            # failed edits shouldn't leak into the next connection
+            with pytest.raises(Exception):
+                await api.edit_image(image.id, caption="new", add_tags=["/bad/"])
+            assert (await api.get_image(image.id)).caption is None
+
+            await api.edit_image(image.id, caption="new")
+            assert (await api.get_image(image.id)).caption == "new"
+
+        assert api._pool is None
+        assert (await api.get_image(image.id)).caption == "new"
@@ -389,6 +389,73 @@ async def test_root(run_web):
             response = requests.get(url, allow_redirects=False)
             assert response.status_code == 302
 
+        home = requests.get(base, allow_redirects=False).headers["Location"]
+        for method in (requests.get, requests.post):
+            response = method(f"{base}{home}/?a=b", allow_redirects=False)
+            assert response.status_code == 308
+            assert response.headers["Location"] == f"{home}?a=b"
+
+        response = requests.get(f"{base}//example.com/", allow_redirects=False)
+        assert response.status_code == 308
+        assert response.headers["Location"] == "/example.com"
+
+        for path, content_type in (
+            ("style.css", "text/css"),
+            ("scripts.js", "application/javascript"),
+        ):
+            response = requests.get(f"{base}/{path}")
+            assert response.status_code == 200
+            assert response.headers["Content-Type"] == content_type
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert response.headers["Vary"] == "Accept-Encoding"
+            assert response.text
+
+            plain = requests.get(
+                f"{base}/{path}", headers={"Accept-Encoding": "identity"}
+            )
+            assert plain.status_code == 200
+            assert "Content-Encoding" not in plain.headers
+            assert plain.headers["Vary"] == "Accept-Encoding"
+            assert plain.text == response.text
+            assert plain.headers["Etag"] != response.headers["Etag"]
+
+            for encoding in ("gzip;q=0", "gzip;q=0, *", "deflate", "*;q=0"):
+                refused = requests.get(
+                    f"{base}/{path}", headers={"Accept-Encoding": encoding}
+                )
+                assert refused.status_code == 200
+                assert "Content-Encoding" not in refused.headers
+                assert refused.headers["Etag"] == plain.headers["Etag"]
+
+            for encoding in ("gzip;q=0.5", "identity, *"):
+                accepted = requests.get(
+                    f"{base}/{path}", headers={"Accept-Encoding": encoding}
+                )
+                assert accepted.headers["Content-Encoding"] == "gzip"
+                assert accepted.headers["Etag"] == response.headers["Etag"]
+
+            # a validator for one encoding doesn't validate the other
+            mismatched = requests.get(
+                f"{base}/{path}", headers={"If-None-Match": plain.headers["Etag"]}
+            )
+            assert mismatched.status_code == 200
+            assert mismatched.headers["Content-Encoding"] == "gzip"
+
+            response = requests.get(
+                f"{base}/{path}",
+                headers={"If-None-Match": response.headers["Etag"]},
+            )
+            assert response.status_code == 304
+
+            response = requests.get(
+                f"{base}/{path}",
+                headers={
+                    "Accept-Encoding": "identity",
+                    "If-None-Match": plain.headers["Etag"],
+                },
+            )
+            assert response.status_code == 304
+
 
 @pytest.mark.asyncio
 async def test_api_root(run_web):
@@ -402,6 +469,17 @@ async def test_api_root(run_web):
         assert endpoints.keys() == {"locations", "tasks", "images", "tags", "search"}
         assert BeautifulSoup(response.text, "html.parser").find(id="actions") is None
 
+        assert response.headers["Content-Encoding"] == "gzip"
+
+        refused = requests.get(f"{base}", headers={"Accept-Encoding": "gzip;q=0"})
+        assert refused.status_code == 200
+        assert "Content-Encoding" not in refused.headers
+        assert refused.text == response.text
+
+        etag = response.headers["Etag"]
+        response = requests.get(f"{base}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
 
 @pytest.mark.asyncio
 async def test_locations(run_web, tmp_path, image_files, test_images):
@@ -895,6 +973,18 @@ async def test_images(run_web, tmp_path, image_files, test_images):
         assert response.status_code == 200
         assert parse_image(response.text)["id"] == image["id"]
 
+        # image files
+        response = requests.get(f"{api_base}/file/{image['id']}")
+        assert response.status_code == 200
+        assert response.content == image["full_path"].read_bytes()
+        etag = response.headers["Etag"]
+
+        response = requests.get(
+            f"{api_base}/file/{image['id']}", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+
         # deleting images
         assert requests.get(f"{api_base}/image/{image['id']}").status_code == 200
 
@@ -1154,6 +1244,38 @@ async def test_images(run_web, tmp_path, image_files, test_images):
         images = parse_all_images(response.text, base)
         assert set(images.keys()) == set(files.values())
 
+        response = requests.post(
+            f"{base}{endpoints['search']}",
+            {
+                "filter1-parameter": "name",
+                "filter1-comparison": "ends with",
+                "filter1-value": "89",
+            },
+        )
+        assert response.status_code == 200
+        images = parse_all_images(response.text, base)
+        assert images.keys() == {files["789.xyz"]}
+
+        # spans
+        response = requests.post(
+            f"{base}{endpoints['search']}",
+            {
+                "filter1-parameter": "name",
+                "filter1-comparison": "is",
+                "filter1-value": "nonexistent",
+                "span": "2",
+                "span-type": "days",
+            },
+        )
+        assert response.status_code == 200
+        assert parse_all_images(response.text, base) == {}
+
+        response = requests.post(
+            f"{base}{endpoints['search']}",
+            {"span": "2", "span-type": "fortnights"},
+        )
+        assert response.status_code == 400
+
         # all
         response = requests.post(
             f"{base}{endpoints['search']}",